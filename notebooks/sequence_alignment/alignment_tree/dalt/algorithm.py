@@ -1,6 +1,9 @@
 import math
+from dataclasses import dataclass
+from time import perf_counter
 
-from .alignment import Alignment
+from .alignment import Alignment, Operation, max_score_out_of_band, widen_band
+from .stats import Observer, StepStats
 
 COLOR_EXPANDED_BOX = "#00ff00"
 COLOR_SOLUTION_BOX = "#0000ff"
@@ -8,17 +11,442 @@ COLOR_BEST_BOX = "#ff0000"
 COLOR_IGNORED_BOX = "#000000"
 COLOR_BEST_FROM_SET_BOX = "#FF00FF"
 
+# reasons why a run of an algorithm stopped
+STATUS_SOLVED = "solved"
+STATUS_FINISHED = "finished"
+STATUS_MAX_STEPS = "max_steps"
+STATUS_MAX_NODES = "max_nodes"
+STATUS_MAX_BYTES = "max_bytes"
+STATUS_DEADLINE = "deadline"
+
+# a step expands at most one node, which adds at most one child per operation
+MAX_NODES_PER_STEP = len(Operation)
+
+
+@dataclass
+class Budget:
+    """
+    Limits of the resources of a run of an algorithm. The budget is checked before each step, and
+    the run stops if the step could exceed it.
+
+    Attributes:
+        max_nodes (int): Maximum number of nodes of the tree.
+        max_bytes (int): Maximum memory used by the nodes of the tree (approximated from the size
+                         of a single node, see `Alignment._get_node_bytes`).
+        max_seconds (float): Maximum wall clock time of the run, in seconds since its `start`.
+    """
+    max_nodes: int = None
+    max_bytes: int = None
+    max_seconds: float = None
+
+    def check(self, aln: Alignment, start: float) -> str:
+        """
+        Checks if the next step of a run started at `start` (see `time.perf_counter`) on the tree
+        `aln` could exceed the budget.
+
+        Returns:
+            str: The status of the exceeded limit, `None` if the step can be executed.
+        """
+        if self.max_seconds is not None and perf_counter() - start >= self.max_seconds:
+            return STATUS_DEADLINE
+
+        if self.max_nodes is None and self.max_bytes is None:
+            return None
+
+        nodes = aln.count_children() + 1 + MAX_NODES_PER_STEP
+
+        if self.max_nodes is not None and nodes > self.max_nodes:
+            return STATUS_MAX_NODES
+
+        if self.max_bytes is not None and nodes * aln._get_node_bytes() > self.max_bytes:
+            return STATUS_MAX_BYTES
+
+        return None
+
+
+@dataclass
+class SearchResult:
+    """
+    State of an algorithm at the end of a run.
+
+    Attributes:
+        status (str): Why the run stopped (see the `STATUS_*` constants).
+        steps (int): Number of steps executed.
+        solution (Alignment): Solution found, `None` if none.
+        best_node_to_expand (Alignment): Best node that could still be expanded, `None` if none.
+        best_leaf (Alignment): Leaf with the best score, the best partial alignment if no solution
+                               was found.
+    """
+    status: str
+    steps: int
+    solution: Alignment
+    best_node_to_expand: Alignment
+    best_leaf: Alignment
+
+
 class Algorithm:
     """
     Abstract base class for all algorihtms
+
+    Algorithms are executed step by step so they can be resumed from where they stopped:
+        - `start` resets the alignment and the internal state of the algorithm.
+        - `step` performs a single step (usually one expansion) of the algorithm.
+        - `paint` colours the tree to reflect the current state of the algorithm.
+
+    Concrete algorithms must implement the `_step` method and, if needed, extend `_restart` and
+    `_paint` to keep and show their own state.
+
+    Args:
+        band (int): Optional band width. Only the nodes with |i - j| <= `band` are generated. If the
+                    solution found may not be optimal because of the band, the band is doubled and
+                    the search restarted.
+        observer (Observer): Optional observer that receives the statistics of each step and the
+                             changes of the tree (see `stats.py`). Without observer no statistics
+                             are computed.
+
+    Private Attributes:
+        _initial_band (int): Band width given when creating the algorithm.
+        _band (int): Band width currently in use (`None` for no band).
+        _aln (Alignment): Root of the alignment tree being explored.
+        _steps (int): Number of steps executed since the last `start`.
+        _finished (bool): Indicates if the algorithm reached its end.
+        _solution (Alignment): Solution found, if any.
+        _expanded (Alignment): Latest expanded node.
+        _painted (list[tuple[Alignment, str]]): Nodes coloured by `paint` and their previous colour.
+        _frontier_size (int): Nodes that can be expanded, only kept with an observer.
+        _step_stats (list): Nodes created, nodes ignored and expansion time of the current step,
+                            only kept with an observer.
+        _status (str): Why the latest run stopped (see `advance`).
+        _start_time (float): Time (see `time.perf_counter`) of the latest `start`, from which the
+                             deadline of the budgets counts.
     """
-    def run(self, aln:Alignment, max_steps):
+    def __init__(self, band: int=None, observer: Observer=None):
+        self._initial_band = band
+        self._observer = observer
+        self._steps = 0
+        self._status = None
+
+    def start(self, aln: Alignment):
+        """
+        Resets the alignment `aln` and prepares the algorithm to run from the first step.
+        """
+        self._aln = aln
+        self._steps = 0
+        self._status = None
+        self._start_time = perf_counter()
+
+        band = self._initial_band
+
+        if band is not None:
+            # the band must at least include the final position
+            band = max(band, abs(len(aln._seq1) - len(aln._seq2)))
+
+        self._band = band
+
+        self._restart()
+
+    def _restart(self):
+        """
+        Resets the alignment and the state of the search (but not the number of steps).
+        """
+        aln = self._aln
+
+        if self._observer is not None:
+            self._observer.on_reset(aln)
+
+        aln.reset()
+        aln._band = self._band
+
+        self._finished = False
+        self._solution = None
+        self._expanded = aln
+        self._painted = []
+        self._frontier_size = 1 if aln._can_expand() else 0
+
+        # marks the alignment as being explored by this algorithm
+        aln._algorithm = self
+
+    def is_running(self, aln: Alignment) -> bool:
+        """
+        Returns True if the algorithm was started on `aln` and can be resumed from its current state.
+        """
+        return getattr(self, "_aln", None) is aln and getattr(aln, "_algorithm", None) is self
+
+    def _get_steps(self):
+        return self._steps
+
+    steps = property(fget=_get_steps, doc="Number of steps executed since the last `start`.")
+
+    def _get_found(self):
+        return self._solution is not None
+
+    found = property(fget=_get_found, doc="True if a solution was already found.")
+
+    def _get_finished(self):
+        return self._finished
+
+    finished = property(fget=_get_finished, doc="True if the algorithm reached its end.")
+
+    def _get_status(self):
+        return self._status
+
+    status = property(fget=_get_status, doc="Why the latest run stopped (see the `STATUS_*` constants).")
+
+    def _get_result(self):
+        if self._status is None:
+            # not run yet
+            return None
+
+        aln = self._aln
+
+        return SearchResult(self._status, self._steps, self._solution, aln.get_best_node_to_expand(), aln.get_best_leaf())
+
+    result = property(fget=_get_result, doc="State of the algorithm at the end of the latest run (see `SearchResult`), `None` before the first one.")
+
+    def _get_observer(self):
+        return self._observer
+
+    def _set_observer(self, observer):
+        self._observer = observer
+
+        if observer is not None and getattr(self, "_aln", None) is not None:
+            # the frontier is not counted without observer
+            self._frontier_size = sum(not entry.node._expanded for entry in self._aln._get_frontier())
+
+    observer = property(fget=_get_observer, fset=_set_observer, doc="Observer of the steps of the algorithm (see `stats.py`).")
+
+    def step(self) -> bool:
+        """
+        Executes one step of the algorithm, unless it already reached its end.
+
+        Returns:
+            bool: True if the algorithm reached its end.
+        """
+        if self._finished:
+            return True
+
+        # the colours painted in the previous step must not leak into the next one
+        self._unpaint()
+
+        if self._observer is not None:
+            start = perf_counter()
+            self._step_stats = [0, 0, 0.0]
+
+        self._finished = self._step()
+        self._steps += 1
+
+        if self._finished and self._solution is not None and not self._is_band_optimal():
+            # a better solution may exist outside the band
+            self._band = widen_band(self._band, len(self._aln._seq1), len(self._aln._seq2))
+            self._restart()
+
+        if self._observer is not None:
+            self._report_step(perf_counter() - start)
+
+        return self._finished
+
+    def _expand(self, node: Alignment, ignore: bool=False):
+        """
+        Expands `node` (see `Alignment.expand`), keeping the statistics of the step if there is an
+        observer.
+        """
+        if self._observer is None:
+            node.expand(ignore=ignore)
+            return
+
+        start = perf_counter()
+        can_expand = node._can_expand()
+        count_children = len(node._children)
+
+        node.expand(ignore=ignore)
+
+        stats = self._step_stats
+        stats[2] += perf_counter() - start
+
+        if ignore:
+            stats[1] += 1
+        else:
+            stats[0] += len(node._children)
+
+        self._frontier_size += sum(child._can_expand() for child in node._children) - can_expand
+
+        for child in node._children[count_children:]:
+            self._observer.on_add_child(node, child)
+
+    def _expand_path(self, node: Alignment, op: Operation) -> Alignment:
+        """
+        Marks `node` as expanded adding only its child of the operation `op` (e.g. the next node of
+        an optimal path already known), keeping the statistics of the step as `_expand`.
+
+        Returns:
+            Alignment: The new child.
+        """
+        if self._observer is None:
+            node.expand(ignore=True)
+            child = node.child_alignment_factory(op)
+            node.add_child(child)
+
+            return child
+
+        start = perf_counter()
+        can_expand = node._can_expand()
+
+        node.expand(ignore=True)
+        child = node.child_alignment_factory(op)
+        node.add_child(child)
+
+        stats = self._step_stats
+        stats[0] += 1
+        stats[2] += perf_counter() - start
+
+        self._frontier_size += child._can_expand() - can_expand
+
+        self._observer.on_add_child(node, child)
+
+        return child
+
+    def _report_step(self, seconds: float):
+        """
+        Sends the statistics of the step that took `seconds` to the observer.
+        """
+        created, ignored, expansion_time = self._step_stats
+        best = self._aln.get_best_node_to_expand()
+
+        self._observer.on_step(StepStats(self._steps, created, ignored, self._frontier_size, best.score if best else None, seconds - expansion_time, expansion_time))
+
+    def _is_band_optimal(self) -> bool:
+        """
+        Returns True if no alignment outside the band can score better than the solution found.
+        """
+        if self._band is None:
+            return True
+
+        aln = self._aln
+        bound = max_score_out_of_band(len(aln._seq1), len(aln._seq2), aln._vmatch, aln._vmismatch, aln._vgap, self._band)
+
+        return bound is None or self._solution.score >= bound
+
+    def _step(self) -> bool:
+        """
+        Executes one step of the algorithm, updating `_expanded` and `_solution`.
+
+        Returns:
+            bool: True if the algorithm reached its end.
+        """
+        assert False, 0     # pragma: no cover
+
+    def _color(self, node: Alignment, color: str):
+        """
+        Colours `node` keeping its previous colour so it can be restored by `_unpaint`.
+        """
+        self._painted.append((node, node.color))
+        self._set_color(node, color)
+
+    def _set_color(self, node: Alignment, color: str):
+        """
+        Colours `node`, reporting the change to the observer. The colour is kept after the step,
+        unless `node` is coloured with `_color`.
+        """
+        node.color = color
+
+        if self._observer is not None:
+            self._observer.on_paint(node, color)
+
+    def _unpaint(self):
+        for node, color in reversed(self._painted):
+            self._set_color(node, color)
+
+        self._painted = []
+
+    def paint(self):
+        """
+        Colours the tree to represent the current state of the algorithm.
+        """
+        self._unpaint()
+        self._paint()
+
+    def _paint(self):
+        # colour green the latest expanded node
+        if self._expanded:
+            self._color(self._expanded, COLOR_EXPANDED_BOX)
+
+        if self._solution:
+            # colour blue the solution if any was found
+            self._color(self._solution, COLOR_SOLUTION_BOX)
+        else:
+            # colour red the best unexplored node so far
+            # which will be the green box in the a step
+            best_non_expanded = self._aln.get_best_node_to_expand()
+
+            if best_non_expanded:
+                self._color(best_non_expanded, COLOR_BEST_BOX)
+
+    def advance(self, max_steps: int, budget: Budget=None):
+        """
+        Resumes the algorithm until `max_steps` steps were executed, until a solution is found or
+        until the next step could exceed the `budget`, and paints the final state.
+
+        The deadline of the budget counts from the `start` of the run, not from this call, so a
+        run resumed several times stops at the same time as a single one.
+
+        The reason why it stopped is kept in `status`, and the best partial state in `result`.
+
+        Returns:
+            tuple (bool, int): True if a solution was found, the number of steps executed.
+        """
+        self._status = None
+
+        while self._steps < max_steps and not self._finished:
+            if budget is not None:
+                self._status = budget.check(self._aln, self._start_time)
+
+                if self._status is not None:
+                    break
+
+            self.step()
+
+        if self._finished:
+            self._status = STATUS_SOLVED if self.found else STATUS_FINISHED
+        elif self._status is None:
+            self._status = STATUS_MAX_STEPS
+
+        self.paint()
+
+        return self.found, self._steps
+
+    def run(self, aln:Alignment, max_steps, budget: Budget=None):
         """
         Updates the alignment `aln` with the state of the algorithm after `max_steps` or until a
-        solution is found.
+        solution is found (or the `budget` is exhausted, see `advance`).
 
         Returns:
             tuple (bool, int): True if a solution was found, the number of steps executed.
         """
-        assert False, 0     # pragma: no cover
+        self.start(aln)
+
+        return self.advance(max_steps, budget)
+
+    def iterate(self, aln: Alignment, max_steps: int, start_step: int=0, budget: Budget=None):
+        """
+        Generator that runs the algorithm a single time, yielding the state after each step from
+        `start_step` up to `max_steps` (excluded) or until a solution is found or the `budget` of
+        the whole run is exhausted.
+
+        At each iteration the tree is in the same state that `run(aln, steps)` would leave it.
+
+        Yields:
+            tuple (bool, int): True if a solution was found, the number of steps executed.
+        """
+        self.start(aln)
+
+        for i in range(start_step, max_steps):
+            found, steps = self.advance(i, budget)
+
+            if not self._finished and self._status != STATUS_MAX_STEPS and i > start_step:
+                # the budget stopped the run before the step, the state was already yielded
+                break
+
+            yield found, steps
 
+            if self._finished or self._status != STATUS_MAX_STEPS:
+                break
@@ -0,0 +1,106 @@
+import heapq
+
+from .alignment import Alignment
+from .algorithm import *
+
+
+def max_remaining_score(remaining1: int, remaining2: int, vmatch: int, vmismatch: int, vgap: int):
+    """
+    Upper bound of the score that can still be achieved when `remaining1` and `remaining2`
+    characters of each sequence are left to align.
+
+    It's the best score if every pair of characters scored the best of `vmatch` and `vmismatch`.
+    The score is linear in the number of pairs, so the best is either to pair as many characters as
+    possible or none. The bound never underestimates the score (admissible) and never decreases
+    more than the score of a single operation (consistent).
+    """
+    pairs = min(remaining1, remaining2)
+    best_pair = max(vmatch, vmismatch)
+
+    return max(pairs * best_pair + (remaining1 + remaining2 - 2 * pairs) * vgap, (remaining1 + remaining2) * vgap)
+
+
+class AlgorithmAStar(Algorithm):
+    """
+    A* algorithm. Expands the node with the best score plus the best score that can still be
+    achieved from its coordinates (see `max_remaining_score`). As in the dynamic programming
+    algorithm, nodes with the same coordinates as an already expanded node, with no better score,
+    are ignored.
+
+    As the heuristic is admissible the first solution taken from the queue is optimal, and the
+    search expands far fewer nodes than the brute force or the dynamic programming algorithms.
+
+    Private Attributes:
+        _queue (list[tuple]): Priority queue of `(-estimate, -score, order, node)` with the nodes
+                              to explore, including the solutions.
+        _count (int): Number of nodes added to the queue, to keep the order of the ties.
+        _scoreboard (dict[tuple[int, int], Alignment]): Best alignment for each position coordinates.
+    """
+    def _restart(self):
+        super()._restart()
+
+        self._queue = []
+        self._count = 0
+        self._scoreboard = {}
+
+        self._push(self._aln)
+
+    def _estimate(self, node: Alignment):
+        i, j = node.coords
+
+        return node.score + max_remaining_score(len(node._seq1) - i, len(node._seq2) - j, node._vmatch, node._vmismatch, node._vgap)
+
+    def _push(self, node: Alignment):
+        heapq.heappush(self._queue, (-self._estimate(node), -node.score, self._count, node))
+        self._count += 1
+
+    def _step(self):
+        # get the node with the best estimated final score
+        _, _, _, to_expand = heapq.heappop(self._queue)
+
+        if to_expand.is_solution():
+            # no other node can lead to a better solution
+            self._solution = to_expand
+
+            return True
+
+        best_aln_coords = self._scoreboard.get(to_expand.coords, None)
+
+        if best_aln_coords is not None and to_expand.score <= best_aln_coords.score:
+            # the node is dominated by a node already expanded in the same (i, j) position
+            self._set_color(to_expand, COLOR_IGNORED_BOX)
+            self._expand(to_expand, ignore=True)
+        else:
+            self._scoreboard[to_expand.coords] = to_expand
+            self._expanded = to_expand
+
+            self._expand(to_expand)
+
+            for child in to_expand._children:
+                self._push(child)
+
+        return False
+
+    def _paint(self):
+        # colour yellow each best score in their position
+        for node in self._scoreboard.values():
+            self._color(node, COLOR_BEST_FROM_SET_BOX)
+
+        # colour green the latest expanded node
+        if self._expanded:
+            self._color(self._expanded, COLOR_EXPANDED_BOX)
+
+        if self._solution:
+            # colour blue the solution if any was found
+            self._color(self._solution, COLOR_SOLUTION_BOX)
+        elif self._queue:
+            # colour red the next node to explore
+            self._color(self._queue[0][3], COLOR_BEST_BOX)
+
+    def run(self, aln:Alignment, max_steps:int, budget: Budget=None):
+        """
+        Run at most `max_steps` steps of the A* algorithm, or until it finds the solution.
+        At the end of the run a tree representing a state of the algorithm is produced and can be
+        graphycally represented.
+        """
+        return super().run(aln, max_steps, budget)
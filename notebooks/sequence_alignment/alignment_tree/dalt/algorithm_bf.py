@@ -2,42 +2,39 @@ from .alignment import Alignment
 from .algorithm import *
 
 class AlgorithmBruteForce(Algorithm):
-    def run(self, aln:Alignment, max_steps:int):
+    """
+    Brute force algorithm. Expands all nodes one by one, until no more expansion is possible.
+    """
+    def _step(self):
+        # get the first node to expand
+        self._expanded = self._aln.get_node_to_expand()
+
+        if self._expanded:
+            self._expand(self._expanded)
+
+            return False
+
+        # exits when no more expansion is possible
+        # in the brute force case, by definition, the best leaf
+        # at the end of the full expansion is the solution
+        self._solution = self._aln.get_solution()
+
+        assert self._solution is not None, "No solution found check algorithm for correctness!"
+
+        return True
+
+    def _paint(self):
+        # colour green the latest expanded node
+        if self._expanded:
+            self._color(self._expanded, COLOR_EXPANDED_BOX)
+
+        if self._solution:
+            self._color(self._solution, COLOR_SOLUTION_BOX)
+
+    def run(self, aln:Alignment, max_steps:int, budget: Budget=None):
         """
         Run at most `max_steps` steps of the brute force algorithm, or until it finds the solution.
         At the end of the run a tree representing a state of the algorithm is produced and can be
         graphycally represented.
         """
-        aln.reset()
-
-        solution = None
-        expanded = aln
-
-        if max_steps == 0:
-            i = 0
-        else:
-            for i in range(max_steps):
-                # get the first node to expand
-                expanded = aln.get_node_to_expand()
-    
-                if expanded:
-                    expanded.expand()
-    
-                else:
-                    # exits when no more expansion is possible
-                    # in the brute force case, by definition, the best leaf
-                    # at the end of the full expansion is the solution
-                    solution = aln.get_solution()
-    
-                    assert solution is not None, "No solution found check algorithm for correctness!"
-    
-                    solution.color = COLOR_SOLUTION_BOX
-                    break
-                    
-            i += 1
-                
-        # colour green the latest expanded node
-        if expanded:
-            expanded.color = COLOR_EXPANDED_BOX
-
-        return solution is not None, i
+        return super().run(aln, max_steps, budget)
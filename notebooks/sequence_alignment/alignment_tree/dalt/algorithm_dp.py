@@ -2,71 +2,61 @@ from .alignment import Alignment
 from .algorithm import *
 
 class AlgorithmDynamicProgramming(Algorithm):
-    def run(self, aln:Alignment, max_steps:int):
-        """
-        Run at most `max_steps` steps of the brute force algorithm, or until it finds the solution.
-        At the end of the run a tree representing a state of the algorithm is produced and can be
-        graphycally represented.
-        """
-        aln.reset()
+    """
+    Dynamic programming algorithm. Expands the best non expanded node, ignoring the nodes that are
+    no better than the best node already expanded for the same (i, j) coordinates.
 
-        # keeps track of the best alignment for each position coordinates
-        scoreboard = {aln.coords: aln}
+    Private Attributes:
+        _scoreboard (dict[tuple[int, int], Alignment]): Best alignment for each position coordinates.
+    """
+    def _restart(self):
+        super()._restart()
 
-        solution = None
-        expanded = aln
+        # keeps track of the best alignment for each position coordinates
+        self._scoreboard = {self._aln.coords: self._aln}
 
-        if max_steps == 0:
-            i = 0
-        else:    
-            for i in range(max_steps):
-                # get the best non expanded node so far
-                to_expand = aln.get_best_node_to_expand()
-    
-                if to_expand:
-                    # get the aligment with the best score in the same (i, j) coordinates as the next
-                    # to expand alignment
-                    best_aln_coords = scoreboard.get(to_expand.coords, None)
-    
-                    # compare the node to expand with the best already expanded
-                    # for the same (i, j) position
-                    if best_aln_coords is not None and to_expand.score < best_aln_coords.score:
-                        # if the node is no better just "ignore" it, i.e. mark it as expanded
-                        # without actually expanding it
-                        to_expand.color = COLOR_IGNORED_BOX
-                        ignore = True
-                    else:
-                        # if the node is the same or better, update the score and expand it
-                        scoreboard[to_expand.coords] = to_expand
-                        expanded = to_expand
-                        ignore = False
-                        
-                    to_expand.expand(ignore=ignore)
-    
-                else:
-                    # by definition, the best leaf at the end of the expansion must be the solution
-                    solution = aln.get_solution()
-                    break
+    def _step(self):
+        # get the best non expanded node so far
+        to_expand = self._aln.get_best_node_to_expand()
 
-            i += 1
+        if not to_expand:
+            # by definition, the best leaf at the end of the expansion must be the solution
+            self._solution = self._aln.get_solution()
 
-        # colour yellow each best score in their position
-        for node in scoreboard.values():
-            node.color = "#FF00FF"
+            return True
 
-        # colour green the latest expanded node
-        if expanded:
-            expanded.color = COLOR_EXPANDED_BOX
+        # get the aligment with the best score in the same (i, j) coordinates as the next
+        # to expand alignment
+        best_aln_coords = self._scoreboard.get(to_expand.coords, None)
 
-        # colour red the best unexplored node so far
-        if solution:
-            solution.color = COLOR_SOLUTION_BOX
+        # compare the node to expand with the best already expanded
+        # for the same (i, j) position
+        if best_aln_coords is not None and to_expand.score < best_aln_coords.score:
+            # if the node is no better just "ignore" it, i.e. mark it as expanded
+            # without actually expanding it
+            self._set_color(to_expand, COLOR_IGNORED_BOX)
+            ignore = True
         else:
-            # colour red the best unexplored node so far
-            # which will be the green box in the a step
-            best_non_expanded = aln.get_best_node_to_expand()
+            # if the node is the same or better, update the score and expand it
+            self._scoreboard[to_expand.coords] = to_expand
+            self._expanded = to_expand
+            ignore = False
+
+        self._expand(to_expand, ignore=ignore)
 
-            if best_non_expanded:
-                best_non_expanded.color = COLOR_BEST_BOX
+        return False
 
-        return solution is not None, i
\ No newline at end of file
+    def _paint(self):
+        # colour yellow each best score in their position
+        for node in self._scoreboard.values():
+            self._color(node, COLOR_BEST_FROM_SET_BOX)
+
+        super()._paint()
+
+    def run(self, aln:Alignment, max_steps:int, budget: Budget=None):
+        """
+        Run at most `max_steps` steps of the dynamic programming algorithm, or until it finds the
+        solution. At the end of the run a tree representing a state of the algorithm is produced
+        and can be graphycally represented.
+        """
+        return super().run(aln, max_steps, budget)
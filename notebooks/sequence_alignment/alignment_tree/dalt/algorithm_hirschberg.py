@@ -0,0 +1,17 @@
+from .alignment import Alignment
+from .algorithm import *
+from .algorithm_nw import AlgorithmNeedlemanWunsch
+from .matrix import linear_global_alignment
+
+class AlgorithmHirschberg(AlgorithmNeedlemanWunsch):
+    """
+    Hirschberg algorithm. Computes the same optimal alignment as the Needleman-Wunsch algorithm in
+    O(n + m) memory (see `matrix.hirschberg`), which allows aligning very long sequences. As in
+    `AlgorithmNeedlemanWunsch` only the optimal path is added to the tree. The `band` argument is
+    ignored as the memory is already linear.
+    """
+    def _align(self, seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int):
+        # the result is optimal, there is no band to widen
+        self._band = None
+
+        return linear_global_alignment(seq1, seq2, vmatch, vmismatch, vgap)
@@ -0,0 +1,71 @@
+from .alignment import Alignment
+from .algorithm import *
+from .matrix import global_alignment, banded_global_alignment
+
+class AlgorithmNeedlemanWunsch(Algorithm):
+    """
+    Needleman-Wunsch algorithm. Fills the classic dynamic programming matrix (see `matrix.py`) when
+    started and then each step adds the next node of the optimal alignment to the tree, so only the
+    optimal path is drawn.
+
+    Private Attributes:
+        _score (int): Score of the optimal alignment.
+        _ops (list[Operation]): Operations of the optimal alignment.
+        _path_end (Alignment): Last node of the optimal path added to the tree so far.
+    """
+    def _restart(self):
+        super()._restart()
+
+        aln = self._aln
+
+        self._score, self._ops = self._align(aln._seq1, aln._seq2, aln._vmatch, aln._vmismatch, aln._vgap)
+        self._path_end = aln
+
+    def _align(self, seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int):
+        """
+        Computes the optimal alignment.
+
+        Returns:
+            tuple (int, list[Operation]): The score of the alignment and its operations.
+        """
+        if self._band is None:
+            return global_alignment(seq1, seq2, vmatch, vmismatch, vgap)
+
+        # the banded alignment widens the band itself until the result is optimal
+        score, ops, self._band = banded_global_alignment(seq1, seq2, vmatch, vmismatch, vgap, self._band)
+
+        return score, ops
+
+    def _step(self):
+        node = self._path_end
+
+        if node.is_solution():
+            # only happens when both sequences are empty
+            self._solution = node
+
+            return True
+
+        # mark the node as expanded and add the single child in the optimal path, the depth of the
+        # node is the number of operations already applied (`ops` would rebuild them from the root
+        # at each step)
+        child = self._expand_path(node, self._ops[node._depth])
+
+        self._expanded = node
+        self._path_end = child
+
+        if child.is_solution():
+            assert child.score == self._score, "The optimal path doesn't reach the optimal score!"
+
+            self._solution = child
+
+            return True
+
+        return False
+
+    def run(self, aln:Alignment, max_steps:int, budget: Budget=None):
+        """
+        Run at most `max_steps` steps of the Needleman-Wunsch algorithm, or until it finds the
+        solution. At the end of the run a tree representing a state of the algorithm is produced
+        and can be graphycally represented.
+        """
+        return super().run(aln, max_steps, budget)
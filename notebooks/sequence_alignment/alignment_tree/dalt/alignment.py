@@ -1,3 +1,6 @@
+import heapq
+import sys
+from array import array
 from enum import Enum, auto
 
 from .node import Node
@@ -9,6 +12,49 @@ class Operation(Enum):
     GAP_DOWN = 3
 
 
+# increments of the positions (i, j) of each operation
+OPERATION_MOVES = {
+    Operation.MATCH: (1, 1),
+    Operation.GAP_UP: (0, 1),
+    Operation.GAP_DOWN: (1, 0),
+}
+
+
+def max_score_out_of_band(n: int, m: int, vmatch: int, vmismatch: int, vgap: int, band: int):
+    """
+    Computes an upper bound of the score of any alignment of two sequences with lengths `n` and `m`
+    that leaves the band |i - j| <= `band`.
+
+    Leaving the band and coming back to the final position (n, m) requires at least
+    2 * (band + 1) - |n - m| gaps, and the remaining characters can at most be paired with the best
+    of `vmatch` and `vmismatch`. As the bound is linear in the number of gaps, its maximum is at
+    one of the ends of the range.
+
+    Returns:
+        float: The upper bound, `None` if no alignment can leave the band.
+    """
+    min_gaps = 2 * (band + 1) - abs(n - m)
+
+    if min_gaps > n + m:
+        return None
+
+    best_pair = max(vmatch, vmismatch)
+
+    return max(min_gaps * vgap + (n + m - min_gaps) * best_pair / 2, (n + m) * vgap)
+
+
+def widen_band(band: int, n: int, m: int):
+    """
+    Doubles the width of the band.
+
+    Returns:
+        int: The new band width, `None` if the band covers all the positions.
+    """
+    band = max(1, band * 2)
+
+    return None if band >= max(n, m) else band
+
+
 class AlignmentNode(Node):
     """
     This class represents a Node in the alignment tree (i.e. a partial alignment step of an
@@ -32,14 +78,21 @@ class AlignmentNode(Node):
     Args:
         seq1, seq2 (str): Sequences to be aligned.
         vmatch, vmismatch, vgap (int): Values of the scoring scheme.
-        ops (list[int]): List of operations performed so far.
+        ops (list[int]): List of operations performed so far (after the `prefix` operations, if
+                         given).
+        prefix (AlignmentNode): Alignment node whose operations precede `ops`. The score and the
+                                positions are derived from it, so a child node is built in
+                                constant time.
 
     Private Attributes:
         _score (int): Score of the current step.
         _i, _j: Next positions of the first and second sequences to be consumed.
+        _ops (tuple): History of operations stored as a linked list of `(op, previous)` tuples,
+                      from the last operation to the first, shared with the parent alignment.
+        _text (str): Cached textual representation of the alignment, `None` until rendered.
     """
 
-    def __init__(self, seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int, ops: list[int]=[]):
+    def __init__(self, seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int, ops: list[int]=[], prefix: "AlignmentNode"=None):
         super().__init__()
 
         """
@@ -50,56 +103,103 @@ class AlignmentNode(Node):
         self._vmatch = vmatch
         self._vmismatch = vmismatch
         self._vgap = vgap
-        self._ops = ops
 
-        self._apply_ops()
+        self._apply_ops(ops, prefix)
 
-    def _apply_ops(self):
-        # "start" is the name by default for the empty alignment
-        mask, mseq1, mseq2 = "", "", ""
-        
-        self._score, i, j = 0, 0, 0
+    def _apply_op(self, op, i: int, j: int):
+        """
+        Computes the effect of the operation `op` when the next positions to be consumed are `i`
+        and `j`.
+
+        Returns:
+            tuple: The aligned characters of each sequence and the mask character, followed by the
+                   increments of the score and of each position.
+        """
+        match op:
+            case Operation.MATCH if self._seq1[i] == self._seq2[j]:
+                return self._seq1[i], "|", self._seq2[j], self._vmatch, 1, 1
+
+            case Operation.MATCH if self._seq1[i] != self._seq2[j]:
+                return self._seq1[i], "x", self._seq2[j], self._vmismatch, 1, 1
+
+            case Operation.GAP_UP:
+                return "-", "-", self._seq2[j], self._vgap, 0, 1
+
+            case Operation.GAP_DOWN:
+                return self._seq1[i], "-", "-", self._vgap, 1, 0
+
+            case _: # pragma: no cover
+                raise Exception(f"Invalid operation {op}")
 
-        if self._ops:
-            # compute mask & score
-            for op in self._ops:
-                match op:
-                    case Operation.MATCH if self._seq1[i] == self._seq2[j]:
-                        ms1, m, ms2, inc_score, inc_i, inc_j = self._seq1[i], "|", self._seq2[j], self._vmatch, 1, 1
+    def _apply_ops(self, ops: list[int], prefix: "AlignmentNode"):
+        if prefix is None:
+            self._score, self._i, self._j, self._ops = 0, 0, 0, None
+        else:
+            self._score, self._i, self._j, self._ops = prefix._score, prefix._i, prefix._j, prefix._ops
+
+        # compute score & positions
+        for op in ops:
+            _, _, _, inc_score, inc_i, inc_j = self._apply_op(op, self._i, self._j)
+
+            self._score += inc_score
+            self._i += inc_i
+            self._j += inc_j
+            self._ops = (op, self._ops)
+
+        # the text is only rendered when needed (see `_get_text`)
+        self._text = None
 
-                    case Operation.MATCH if self._seq1[i] != self._seq2[j]:
-                        ms1, m, ms2, inc_score, inc_i, inc_j = self._seq1[i], "x", self._seq2[j], self._vmismatch, 1, 1
+    def _get_ops(self):
+        ops, link = [], self._ops
 
-                    case Operation.GAP_UP:
-                        ms1, m, ms2, inc_score, inc_i, inc_j = "-", "-", self._seq2[j], self._vgap, 0, 1
+        while link is not None:
+            op, link = link
+            ops.append(op)
 
-                    case Operation.GAP_DOWN:
-                        ms1, m, ms2, inc_score, inc_i, inc_j = self._seq1[i], "-", "-", self._vgap, 1, 0
+        ops.reverse()
 
-                    case _: # pragma: no cover
-                        raise Exception(f"Invalid operation {op}")
+        return ops
 
-                mseq1 += ms1
-                mask += m
-                mseq2 += ms2
-                i += inc_i
-                j += inc_j
+    ops = property(fget=_get_ops, doc="List of operations performed so far.")
 
-                self._score += inc_score
+    def _get_text(self):
+        if self._text is None:
+            self._text = self._render_text()
 
-        self._i, self._j = i, j 
+        return self._text
 
+    def _set_text(self, text):
+        self._text = text
+
+    text = property(fget=_get_text, fset=_set_text, doc="Textual representation of the alignment, rendered on first access.")
+
+    def _render_text(self):
         """
-        Finally builds the textual representation of the AlignmentNode which is a three line string
+        Builds the textual representation of the AlignmentNode which is a three line string
         containing:
             - The first sequence with the operations applied.
             - The masked representation of the operations + the score
             - The second sequence with the operations applied.
         """
-        if mask:
-            self.text = f"{mseq1} - {i}\n{mask} ({self.score:2d})\n{mseq2} - {j}"
-        else:
-            self.text = f"------ 0\nstart ({self.score:2d})\n------ 0"
+        ops = self.ops
+
+        if not ops:
+            # "start" is the name by default for the empty alignment
+            return f"------ 0\nstart ({self.score:2d})\n------ 0"
+
+        mseq1, mask, mseq2 = [], [], []
+        i, j = 0, 0
+
+        for op in ops:
+            ms1, m, ms2, _, inc_i, inc_j = self._apply_op(op, i, j)
+
+            mseq1.append(ms1)
+            mask.append(m)
+            mseq2.append(ms2)
+            i += inc_i
+            j += inc_j
+
+        return f"{''.join(mseq1)} - {i}\n{''.join(mask)} ({self.score:2d})\n{''.join(mseq2)} - {j}"
 
     def _get_score(self):
         return self._score
@@ -124,7 +224,7 @@ class AlignmentNode(Node):
         if op == Operation.GAP_DOWN and self._can_consume_seq1() or \
            op == Operation.GAP_UP and self._can_consume_seq2() or \
            op == Operation.MATCH and self._can_consume():
-            return Alignment(self._seq1, self._seq2, self._vmatch, self._vmismatch, self._vgap, self._ops + [op])
+            return Alignment(self._seq1, self._seq2, self._vmatch, self._vmismatch, self._vgap, [op], prefix=self)
         else:
             return None
 
@@ -132,6 +232,227 @@ class AlignmentNode(Node):
         return not self._can_consume_seq1() and not self._can_consume_seq2()
 
 
+# the labels of the marks of `_TreeOrder` are in [0, 2**_ORDER_BITS)
+_ORDER_BITS = 62
+
+# the labels of a range of 2**bits labels are spread when it holds less than
+# (2 / _ORDER_DENSITY)**bits marks, so the ranges get sparser as they grow (the full range of labels
+# is always spread)
+_ORDER_DENSITY = 1.4
+
+
+class _TreeOrder:
+    """
+    Depth-first order of all the nodes of a tree, kept by its root node.
+
+    Each node has two marks in a linked list, one before and one after the marks of its sub tree,
+    so a new child is inserted just before the end mark of its parent in constant time. The labels
+    of the marks are increasing integers, so comparing the labels of the beginning marks of two
+    nodes compares their positions in a depth-first traversal, without building their paths.
+
+    When there is no free label between two marks, the labels of the surrounding marks are spread
+    over the smallest range of labels that is sparse enough (amortized O(log n) per node). This
+    never changes the relative order of the labels, so the structures sorted by label stay sorted.
+
+    The marks are kept in typed arrays: the beginning mark of the node in slot `k` is `2 * k` and
+    its end mark `2 * k + 1`.
+
+    Private Attributes:
+        slots (dict[Alignment, int]): Slot of each node of the tree.
+        labels (array): Label of each mark.
+        prev, next (array): Previous and next mark of each mark (-1 at the ends of the list).
+        free (list[int]): Slots of the nodes removed from the tree, reused by the new nodes.
+    """
+    __slots__ = ("slots", "labels", "prev", "next", "free")
+
+    def __init__(self, root):
+        self.slots, self.free = {}, []
+
+        # the marks in the order of a depth-first traversal, where `None` closes the sub tree of
+        # the node at the top of `opened`
+        marks, stack, opened = [], [root], []
+
+        while stack:
+            node = stack.pop()
+
+            if node is None:
+                marks.append(2 * opened.pop() + 1)
+            else:
+                slot = self.slots[node] = len(self.slots)
+                marks.append(2 * slot)
+                opened.append(slot)
+                stack.append(None)
+                stack.extend(reversed(node._children))
+
+        count = len(marks)
+        spacing = 2**_ORDER_BITS // count
+
+        self.labels, self.prev, self.next = array("q", [0]) * count, array("i", [-1]) * count, array("i", [-1]) * count
+
+        for position, mark in enumerate(marks):
+            self.labels[mark] = position * spacing
+
+            if position > 0:
+                self.prev[mark], self.next[marks[position - 1]] = marks[position - 1], mark
+
+    def __contains__(self, node):
+        # nodes removed from the tree (e.g. below a compacted node) have no marks
+        return node in self.slots
+
+    def label(self, node) -> int:
+        """
+        Label of the node, the nodes of the tree sort by label in depth-first order.
+        """
+        return self.labels[2 * self.slots[node]]
+
+    def add(self, node, parent):
+        """
+        Adds the node as the last child of `parent`.
+        """
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = len(self.labels) // 2
+            self.labels.extend((0, 0))
+            self.prev.extend((-1, -1))
+            self.next.extend((-1, -1))
+
+        self.slots[node] = slot
+
+        # the labels before the new beginning mark are never used again (the marks are always
+        # inserted before an end mark), so it takes the first free label
+        self._insert(2 * slot, self.prev[2 * self.slots[parent] + 1], first=True)
+        self._insert(2 * slot + 1, 2 * slot)
+
+    def remove(self, node):
+        slot = self.slots.pop(node)
+
+        for mark in (2 * slot, 2 * slot + 1):
+            prev, next = self.prev[mark], self.next[mark]
+            self.next[prev], self.prev[next] = next, prev
+
+        self.free.append(slot)
+
+    def _insert(self, mark: int, prev: int, first: bool=False):
+        """
+        Inserts `mark` after `prev`, which is never the last mark (the end mark of the root), with
+        the first free label after `prev` or in the middle of the free labels.
+        """
+        labels, prevs, nexts = self.labels, self.prev, self.next
+
+        next = nexts[prev]
+        prevs[mark], nexts[mark], nexts[prev], prevs[next] = prev, next, mark, mark
+
+        if labels[next] - labels[prev] > 1:
+            labels[mark] = labels[prev] + 1 if first else (labels[prev] + labels[next]) // 2
+            return
+
+        # grow a range of labels around the new mark until it's sparse enough
+        first, last, count, bits = mark, mark, 1, 0
+
+        while True:
+            bits += 1
+            start = labels[prev] >> bits << bits
+            end = start + (1 << bits)
+
+            while prevs[first] != -1 and labels[prevs[first]] >= start:
+                first, count = prevs[first], count + 1
+
+            while nexts[last] != -1 and labels[nexts[last]] < end:
+                last, count = nexts[last], count + 1
+
+            if bits == _ORDER_BITS or count * _ORDER_DENSITY**bits < 1 << bits:
+                break
+
+        step = (1 << bits) // count
+        label = start
+
+        while True:
+            labels[first] = label
+
+            if first == last:
+                return
+
+            first, label = nexts[first], label + step
+
+
+class _FrontierEntry:
+    """
+    Entry of the frontier priority queue. Entries are ordered by descending score and, for the
+    same score, by the position of the node in a depth-first traversal of the tree (the labels of
+    `_TreeOrder`). This is the same order in which the previous recursive search picked the best
+    node.
+
+    The entry keeps the score and the beginning mark of the node in the order, so comparing two
+    entries takes constant time.
+    """
+    __slots__ = ("score", "labels", "mark", "node")
+
+    def __init__(self, node, order: _TreeOrder):
+        self.score, self.labels, self.mark, self.node = node.score, order.labels, 2 * order.slots[node], node
+
+    def __lt__(self, other):
+        if self.score != other.score:
+            return self.score > other.score
+
+        # the labels may change, but never their relative order
+        return self.labels[self.mark] < other.labels[other.mark]
+
+
+class _TreeIndex:
+    """
+    Indexes of all the nodes of a tree, kept by its root node.
+
+    The nodes of each coordinates and of each depth are kept in dictionaries used as ordered sets,
+    so nodes are added and removed in constant time. The first lookup of a bucket sorts its nodes
+    in depth-first order (see `_TreeOrder`), and the sorted list is kept until a node is added to
+    or removed from the bucket.
+
+    Private Attributes:
+        order (_TreeOrder): Depth-first order of the nodes of the tree.
+        by_coords (dict[tuple[int, int], dict[Alignment, None]]): Nodes with each coordinates.
+        by_depth (dict[int, dict[Alignment, None]]): Nodes at each depth of the tree.
+        sorted_coords, sorted_depth (dict): Nodes of each bucket of `by_coords` and `by_depth`
+                                            sorted in depth-first order, if looked up since the
+                                            bucket last changed.
+    """
+    __slots__ = ("order", "by_coords", "by_depth", "sorted_coords", "sorted_depth")
+
+    def __init__(self, root, order: _TreeOrder):
+        self.order = order
+        self.by_coords, self.by_depth, self.sorted_coords, self.sorted_depth = {}, {}, {}, {}
+
+        for node in root.walk():
+            self.add(node)
+
+    def add(self, node):
+        coords, depth = node.coords, node._depth
+
+        self.by_coords.setdefault(coords, {})[node] = None
+        self.by_depth.setdefault(depth, {})[node] = None
+        self.sorted_coords.pop(coords, None)
+        self.sorted_depth.pop(depth, None)
+
+    def remove(self, node):
+        coords, depth = node.coords, node._depth
+
+        del self.by_coords[coords][node]
+        del self.by_depth[depth][node]
+        self.sorted_coords.pop(coords, None)
+        self.sorted_depth.pop(depth, None)
+
+    def lookup(self, buckets: dict, sorted_buckets: dict, key) -> list:
+        """
+        Returns the nodes of the bucket `key` of `buckets` in depth-first order.
+        """
+        nodes = sorted_buckets.get(key)
+
+        if nodes is None:
+            nodes = sorted_buckets[key] = sorted(buckets.get(key, ()), key=self.order.label)
+
+        return list(nodes)
+
+
 class Alignment(AlignmentNode):
     """
     This class extends the AlignmentNode class with some convenience methods for algorithm
@@ -146,23 +467,95 @@ class Alignment(AlignmentNode):
     Private Attributes:
         see `AlignmentNode` class.
         _expanded (bool): Indicates if the node was already expanded.
+        _root (Alignment): Root of the alignment tree the node belongs to.
+        _depth (int): Depth of the node in the tree.
+        _index (int): Position of the node in the list of children of its parent.
+        _hidden (bool): Indicates if any ancestor of the node is not expanded (e.g. the children
+                        of a compacted node), in which case the node cannot be expanded next.
+        _frontier (list[_FrontierEntry]): Priority queue (heap) with the nodes that can be
+                                          expanded. Only kept by the root node, and only built on
+                                          demand. Expanded nodes are lazily removed from the queue.
+        _order (_TreeOrder): Depth-first order of the nodes of the tree. Only kept by the root
+                             node, built on demand for the frontier and the indexes and then updated
+                             as the nodes are added and removed.
+        _indexes (_TreeIndex): Indexes of the nodes of the tree by coordinates and depth. Only kept
+                               by the root node, built on demand and then updated as the nodes are
+                               added and removed.
+        _band (int): Only the children with |i - j| <= `_band` are generated when expanding the
+                     nodes of the tree (`None` for no band). Only used in the root node.
 
     """
-    def __init__(self, seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int, ops: list[int]=[]):
-        super().__init__(seq1, seq2, vmatch, vmismatch, vgap, ops)
+    def __init__(self, seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int, ops: list[int]=[], prefix: AlignmentNode=None):
+        self._root = self
+        self._depth, self._index = 0, 0
+        self._hidden = False
+        self._frontier = None
+        self._order = None
+        self._indexes = None
+        self._band = None
+
+        super().__init__(seq1, seq2, vmatch, vmismatch, vgap, ops, prefix)
 
         self._expanded = False
 
     def reset(self):
+        order, indexes = self._root._order, self._root._indexes
+
+        # the descendants are removed from the tree
+        if order is not None and self in order:
+            for node in self.walk():
+                if node is not self:
+                    order.remove(node)
+
+                    if indexes is not None:
+                        indexes.remove(node)
+
         super().reset()
         
         self._expanded = False
 
+        # the state of any algorithm running on this alignment is lost
+        self._algorithm = None
+
+        # the frontier must be rebuilt to account for the removed nodes
+        self._root._frontier = None
+
+    def add_child(self, child: "Alignment"):
+        super().add_child(child)
+
+        child._root = self._root
+        child._depth = self._depth + 1
+        child._index = len(self._children) - 1
+        child._hidden = self._hidden or not self._expanded
+
+        root = self._root
+        order, indexes, frontier = root._order, root._indexes, root._frontier
+
+        # the order, the indexes and the frontier only keep the nodes of the tree
+        if order is not None and self in order:
+            order.add(child, self)
+
+            if indexes is not None:
+                indexes.add(child)
+
+            # the children of an expanded node are candidates to be expanded next
+            if frontier is not None and not child._hidden and not child._expanded and not child.is_solution():
+                heapq.heappush(frontier, _FrontierEntry(child, order))
+
+        return self
+
+    def _get_node_bytes(self) -> int:
+        """
+        Approximate memory used by each node of the tree, in bytes: the object with its attributes,
+        its list of children, the link of its operation and its cached aggregates.
+        """
+        return sys.getsizeof(self) + sys.getsizeof(self.__dict__) + sys.getsizeof([None] * len(Operation)) + sys.getsizeof((None, None)) + sys.getsizeof((None,) * 4)
+
     def compact(self, color=None):
         count_children = self.count_children()
 
         self.reset()
-        compact_child = Alignment(self._seq1, self._seq2, self._vmatch, self._vmismatch, self._vgap, self._ops)
+        compact_child = Alignment(self._seq1, self._seq2, self._vmatch, self._vmismatch, self._vgap, prefix=self)
         compact_child.text = f"{count_children} children"
 
         self.add_child(compact_child)
@@ -174,15 +567,63 @@ class Alignment(AlignmentNode):
 
         self._expanded = True
 
+        # the node can no longer be expanded
+        self._invalidate_aggregate()
+
+        if self._children:
+            # expanding a compacted node uncovers its sub tree
+            self._update_hidden()
+            self._root._frontier = None
+
         if ignore:
             return
 
+        band = self._root._band
+
         for op in (Operation.GAP_DOWN, Operation.MATCH, Operation.GAP_UP):
+            if band is not None:
+                inc_i, inc_j = OPERATION_MOVES[op]
+
+                if abs(self._i + inc_i - self._j - inc_j) > band:
+                    # the children outside the band are never generated
+                    continue
+
             child = self.child_alignment_factory(op)
 
             if child is not None:
                 self.add_child(child)
 
+    def _update_hidden(self):
+        """
+        Recomputes the `_hidden` flag of all the nodes in the sub tree.
+        """
+        stack = [self]
+
+        while stack:
+            node = stack.pop()
+
+            for child in node._children:
+                child._hidden = node._hidden or not node._expanded
+                stack.append(child)
+
+    def _walk_pruned(self, prune):
+        """
+        Iterates over the nodes of the sub tree in depth-first order, without going below the nodes
+        for which `prune(node)` is True.
+        """
+        stack = [self]
+
+        while stack:
+            node = stack.pop()
+
+            yield node
+
+            if not prune(node):
+                stack.extend(reversed(node._children))
+
+    def _can_expand(self):
+        return not self._expanded and not self.is_solution()
+
     def get_node_to_expand(self):
         """
         Returns the first child that can be expanded.
@@ -190,17 +631,40 @@ class Alignment(AlignmentNode):
         Returns:
             Alignment: the alignment corresponding to the children to be expanded.
         """
-        if not self._expanded and not self.is_solution():
-            return self
-        else:
-            for child in self._children:
-                to_expand = child.get_node_to_expand()
+        return self._get_aggregate()[3]
 
-                if to_expand is not None:
-                    return to_expand
+    def _get_node_to_expand_all(self):
+        """
+        Version of `get_node_to_expand` that traverses the sub tree.
+        """
+        for node in self._walk_pruned(Alignment._can_expand):
+            if node._can_expand():
+                return node
 
         return None
             
+    def _get_frontier(self):
+        """
+        Returns the frontier priority queue of the tree rooted in the current node, building it if
+        needed.
+        """
+        if self._frontier is None:
+            order = self._get_order()
+            self._frontier = []
+            stack = [self]
+
+            while stack:
+                node = stack.pop()
+
+                if node._expanded:
+                    stack.extend(node._children)
+                elif not node.is_solution():
+                    self._frontier.append(_FrontierEntry(node, order))
+
+            heapq.heapify(self._frontier)
+
+        return self._frontier
+
     def get_best_node_to_expand(self):
         """
         Returns the child with the highest score, from all children of the sub tree that can be expanded.
@@ -208,20 +672,62 @@ class Alignment(AlignmentNode):
         Returns:
             Alignment: the alignment corresponding to the best children.
         """
-        if self._expanded:
-            best = list(filter(lambda _: _, [child.get_best_node_to_expand() for child in self._children]))
+        if self._parent is not None:
+            # the frontier is only kept for the full tree
+            return self._get_best_node_to_expand_all()
 
-            if best:
-                return max(best, key=lambda child: child.score)
-            else:
-                return None
+        frontier = self._get_frontier()
 
-        elif self.is_solution():
-            # solutions nodes cannot be expanded
-            return None
+        # lazy removal of the nodes expanded since they were added to the frontier
+        while frontier and frontier[0].node._expanded:
+            heapq.heappop(frontier)
 
-        else:
-            return self
+        return frontier[0].node if frontier else None
+
+    def _get_best_node_to_expand_all(self):
+        """
+        Version of `get_best_node_to_expand` that traverses the sub tree, used when the current node
+        is not the root of the tree.
+        """
+        # only the children of expanded nodes can be expanded next
+        candidates = filter(Alignment._can_expand, self._walk_pruned(lambda node: not node._expanded))
+
+        # on ties `max` keeps the first node found
+        return max(candidates, key=lambda node: node.score, default=None)
+
+    def _compute_aggregate(self, children: list["Alignment"]) -> tuple:
+        """
+        Extends the aggregate values of `Node` with the best leaf, the best solution and the first
+        node that can be expanded of the sub tree. On ties the first node in a depth-first traversal
+        is kept.
+
+        Returns:
+            tuple (int, Alignment, Alignment, Alignment): Number of nodes in the sub tree (excluding
+                                                          the current node), best leaf, best
+                                                          solution and first node to expand (`None`
+                                                          if there is none).
+        """
+        count, best_leaf = 0, None if children else self
+        to_expand = self if self._can_expand() else None
+
+        # no solution is searched below a solution
+        best_solution = self if self.is_solution() else None
+        is_solution = best_solution is not None
+
+        for child in children:
+            child_count, child_leaf, child_solution, child_to_expand = child._aggregate
+            count += 1 + child_count
+
+            if to_expand is None:
+                to_expand = child_to_expand
+
+            if best_leaf is None or child_leaf.score > best_leaf.score:
+                best_leaf = child_leaf
+
+            if not is_solution and child_solution is not None and (best_solution is None or child_solution.score > best_solution.score):
+                best_solution = child_solution
+
+        return count, best_leaf, best_solution, to_expand
 
     def get_best_leaf(self):
         """
@@ -230,32 +736,95 @@ class Alignment(AlignmentNode):
         Returns:
             Alignment: the alignment corresponding to the best leaf. 
         """
-        if self._children:
-            return max([child.get_best_leaf() for child in self._children], key=lambda child: child.score)
-        else:
-            return self
+        return self._get_aggregate()[1]
+
+    def _get_best_leaf_all(self):
+        """
+        Version of `get_best_leaf` that traverses the sub tree.
+        """
+        return max(filter(Alignment.is_leaf, self.walk()), key=lambda node: node.score)
 
     def get_solution(self):
         """
         Returns the best solution node starting in a width-first search to the tree.
         """
-        if self.is_solution():
-            return self
-        else:
-            solutions = list(filter(lambda _: _, [child.get_solution() for child in self._children]))
+        return self._get_aggregate()[2]
 
-            if solutions:
-                return max(solutions, key=lambda child: child.score)
+    def _get_solution_all(self):
+        """
+        Version of `get_solution` that traverses the sub tree.
+        """
+        solutions = filter(Alignment.is_solution, self._walk_pruned(Alignment.is_solution))
 
-        return None
+        return max(solutions, key=lambda node: node.score, default=None)
+
+    def _get_indexes(self) -> _TreeIndex:
+        """
+        Returns the indexes of the tree, building them if needed.
+        """
+        root = self._root
+
+        if root._indexes is None:
+            root._indexes = _TreeIndex(root, root._get_order())
+
+        return root._indexes
+
+    def _get_order(self) -> _TreeOrder:
+        """
+        Returns the depth-first order of the nodes of the tree, building it if needed.
+        """
+        root = self._root
+
+        if root._order is None:
+            root._order = _TreeOrder(root)
+
+        return root._order
 
     def get_by_coords(self, coords):
-        nodes = []
+        if self._parent is not None:
+            # the indexes are only used for the full tree
+            return self._get_by_coords_all(coords)
+
+        indexes = self._get_indexes()
+
+        return indexes.lookup(indexes.by_coords, indexes.sorted_coords, coords)
+
+    def _get_by_coords_all(self, coords):
+        """
+        Version of `get_by_coords` that traverses the sub tree.
+        """
+        return [node for node in self.walk() if node.coords == coords]
 
-        if self.coords == coords:
-            nodes.append(self)
+    def get_by_level(self, level):
+        if self._parent is not None:
+            return super().get_by_level(level)
 
-        for child in self._children:
-            nodes += child.get_by_coords(coords)
+        indexes = self._get_indexes()
 
-        return nodes
+        return indexes.lookup(indexes.by_depth, indexes.sorted_depth, level - 1)
+
+    def get_by_id(self, node_id):
+        """
+        Returns the node of the sub tree with the given id (e.g. "*.2.1"), `None` if there is none.
+        """
+        positions = node_id.split(".")
+
+        if positions[0] != "*":
+            return None
+
+        # the id is the path of the node from the root (see `Node.add_child`)
+        node = self._root
+
+        for position in positions[1:]:
+            children = node._children
+
+            if not position.isdigit() or not 0 < int(position) <= len(children):
+                return None
+
+            node = children[int(position) - 1]
+
+        # the node must be in the current sub tree
+        if node == self or node_id.startswith(self.id + "."):
+            return node
+
+        return None
@@ -0,0 +1,60 @@
+# compares the time to draw large trees with the SVG canvas and with the raster canvas
+# $ python bench_canvas.py
+
+import sys
+import time
+
+# adding parent folder to the system path
+sys.path.insert(0, '../..')
+
+from dalt.alignment import Alignment
+from dalt.algorithm_bf import AlgorithmBruteForce
+from dalt.canvas import Canvas, RasterCanvas
+from dalt.simulation import BOX_WIDTH, BOX_HEIGHT, H_MARGIN, V_MARGIN
+
+CASES = [("ABCA", "ABXA"), ("ABCAB", "ABXAB"), ("ABCABC", "ABXAB")]
+REPEAT = 3
+
+
+def best_time(fn):
+    """
+    Best time of `REPEAT` calls to `fn`, in seconds.
+    """
+    times = []
+
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def svg_document(aln):
+    """
+    Builds and serializes the SVG drawing of the tree, i.e. the SVG path without rasterization.
+    """
+    _, _, box = aln._arrange_all()
+
+    canvas = Canvas(box.min_col, box.min_row, box.max_col, box.max_row, BOX_WIDTH, BOX_HEIGHT, H_MARGIN, V_MARGIN)
+    aln._draw_all(canvas)
+
+    return canvas._drawing.as_svg()
+
+
+print(f"{'sequences':>20} {'nodes':>7} {'raster':>9} {'svg':>9} {'svg+png':>9}")
+
+for seq1, seq2 in CASES:
+    aln = Alignment(seq1, seq2, 3, -1, -2)
+    AlgorithmBruteForce().run(aln, max_steps=100000)
+
+    raster = best_time(lambda: aln.draw(BOX_WIDTH, BOX_HEIGHT, H_MARGIN, V_MARGIN, canvas_class=RasterCanvas))
+    svg = best_time(lambda: svg_document(aln))
+
+    try:
+        png = f"{best_time(lambda: aln.draw(BOX_WIDTH, BOX_HEIGHT, H_MARGIN, V_MARGIN)):8.3f}s"
+    except ImportError:
+        # the rasterization of the SVG needs the Cairo library
+        png = "n/a"
+
+    print(f"{seq1 + ' x ' + seq2:>20} {aln.count_children() + 1:7d} {raster:8.3f}s {svg:8.3f}s {png:>9}")
@@ -0,0 +1,168 @@
+# measures the algorithms, the layout, the drawing and the movies over a grid of sequence lengths
+# and scoring schemes, and stores the results to compare them between versions
+# $ python bench_suite.py --output v4.json
+# $ python bench_suite.py --output new.json --compare v4.json
+
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+
+# adding parent folder to the system path
+sys.path.insert(0, '../..')
+
+from dalt.alignment import Alignment
+from dalt.algorithm_bf import AlgorithmBruteForce
+from dalt.algorithm_greedy import AlgorithmGreedy
+from dalt.algorithm_dp import AlgorithmDynamicProgramming
+from dalt.canvas import Canvas, RasterCanvas
+from dalt.simulation import Simulation, BOX_WIDTH, BOX_HEIGHT, H_MARGIN, V_MARGIN
+
+ALGORITHMS = [AlgorithmBruteForce, AlgorithmGreedy, AlgorithmDynamicProgramming]
+LENGTHS = [4, 6, 8]
+SCHEMES = [(3, -1, -2), (1, -1, -1), (2, -3, -1)]
+MAX_STEPS = 2000
+MOVIE_STEPS = 30
+REPEAT = 3
+
+# a measure is a regression when it's slower than the previous one by more than this factor
+THRESHOLD = 1.25
+
+
+def sequences(length):
+    """
+    Pair of random sequences of the given length, always the same for the same length.
+    """
+    rnd = random.Random(length)
+
+    seq1 = "".join(rnd.choice("ABC") for _ in range(length))
+    seq2 = "".join(rnd.choice("ABC") for _ in range(length))
+
+    return seq1, seq2
+
+
+def measure(fn):
+    """
+    Best time of a call to `fn` and the peak memory allocated by one more call.
+
+    The calls are repeated in loops of at least 0.2 seconds (see `timeit.Timer.autorange`) so the
+    fast ones are measured as precisely as the slow ones.
+
+    Returns:
+        tuple: The best time in seconds, the peak memory in KiB and the result of the last call.
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(REPEAT, number)) / number
+
+    # tracing the allocations slows down the code, so the peak is measured on its own
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return seconds, peak / 1024, result
+
+
+def run_algorithm(algorithm_class, seq1, seq2, scheme):
+    aln = Alignment(seq1, seq2, *scheme)
+    _, steps = algorithm_class().run(aln, max_steps=MAX_STEPS)
+
+    return aln, steps
+
+
+def draw(aln, canvas_class):
+    try:
+        return aln.draw(BOX_WIDTH, BOX_HEIGHT, H_MARGIN, V_MARGIN, canvas_class=canvas_class)
+    except ImportError:
+        # the rasterization of the SVG needs the Cairo library
+        return None
+
+
+def bench(lengths, schemes):
+    """
+    Runs all the benchmarks.
+
+    Returns:
+        list[dict]: One record for each benchmark, algorithm, length and scoring scheme.
+    """
+    results = []
+
+    for length in lengths:
+        seq1, seq2 = sequences(length)
+
+        for scheme in schemes:
+            for algorithm_class in ALGORITHMS:
+                key = {"algorithm": algorithm_class.__name__, "length": length, "scheme": list(scheme)}
+
+                seconds, peak, (aln, steps) = measure(lambda: run_algorithm(algorithm_class, seq1, seq2, scheme))
+                nodes = aln.count_children() + 1
+                results.append(dict(key, bench="run", seconds=seconds, peak_kib=peak, steps=steps, nodes=nodes, steps_per_second=steps / seconds))
+
+                seconds, peak, _ = measure(aln._arrange_all)
+                results.append(dict(key, bench="layout", seconds=seconds, peak_kib=peak, nodes=nodes))
+
+                for canvas_class in (RasterCanvas, Canvas):
+                    if draw(aln, canvas_class) is not None:
+                        seconds, peak, _ = measure(lambda: draw(aln, canvas_class))
+                        results.append(dict(key, bench=f"draw_{canvas_class.__name__}", seconds=seconds, peak_kib=peak, nodes=nodes))
+
+                seconds, peak, movie = measure(lambda: Simulation(Alignment(seq1, seq2, *scheme), algorithm_class(), canvas_class=RasterCanvas).movie(MOVIE_STEPS))
+                results.append(dict(key, bench="movie", seconds=seconds, peak_kib=peak, frames=movie.frame_count()))
+
+                print(f"{algorithm_class.__name__:>28} {length:3d} {str(scheme):>12} {steps:5d} steps {nodes:6d} nodes")
+
+    return results
+
+
+def compare(results, previous, threshold):
+    """
+    Prints the measures that are slower than the previous ones by more than `threshold`.
+
+    Returns:
+        int: Number of regressions found.
+    """
+    def key(record):
+        return record["bench"], record["algorithm"], record["length"], tuple(record["scheme"])
+
+    previous = {key(record): record for record in previous}
+    regressions = 0
+
+    for record in results:
+        old = previous.get(key(record))
+
+        if old is None:
+            continue
+
+        ratio = record["seconds"] / old["seconds"] if old["seconds"] else 1
+
+        if ratio > threshold:
+            regressions += 1
+            print(f"REGRESSION {' '.join(map(str, key(record)))}: {old['seconds']:.4f}s -> {record['seconds']:.4f}s ({ratio:.2f}x)")
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks of the alignment algorithms and their drawing.")
+    parser.add_argument("--output", help="JSON file where the results are stored.")
+    parser.add_argument("--compare", help="JSON file with previous results to compare with.")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Slowdown factor reported as a regression.")
+    parser.add_argument("--quick", action="store_true", help="Only the smallest length and the first scoring scheme.")
+    args = parser.parse_args()
+
+    results = bench(LENGTHS[:1] if args.quick else LENGTHS, SCHEMES[:1] if args.quick else SCHEMES)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"date": datetime.now().isoformat(), "python": platform.python_version(), "platform": platform.platform(), "results": results}, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+
+        sys.exit(1 if regressions else 0)
@@ -1,9 +1,27 @@
 import io
+import math
+from dataclasses import dataclass
+from functools import lru_cache
 
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFont
 
 import drawsvg as draw
 
+@dataclass
+class Viewport:
+    """
+    Fixed area of the image in which a canvas is drawn.
+
+    Args:
+        x, y (int): Position in the image of the top left corner of the grid, in pixels.
+        width, height (int): Size of the image, in pixels.
+    """
+    x: int
+    y: int
+    width: int
+    height: int
+
+
 class Canvas:
     """
     This is the canvas drawing board.
@@ -21,14 +39,17 @@ class Canvas:
                         cell (in pixels).
         v_margin (int): Vertical distance between the edge of the boxes and the limit of the grid
                         cell (in pixels).
+        viewport (Viewport): Optional position of the grid in the image and size of the image. By
+                             default the image has the size of the grid.
 
     Private Attributes:
+        _x_offset, _y_offset (int): Position of the grid in the image, in pixels.
         _drawing (Drawing): The ` Drawing`  object from the ` drawsvg`  package that is used to
                             actually draw into the image
     """
     TEXT_INDENT_PERC = 0.02
 
-    def __init__(self, min_col: int, min_row: int, max_col: int, max_row: int, box_width: int, box_height: int, h_margin: int, v_margin: int):
+    def __init__(self, min_col: int, min_row: int, max_col: int, max_row: int, box_width: int, box_height: int, h_margin: int, v_margin: int, viewport: Viewport=None):
         self._min_row = min_row
         self._min_col = min_col
 
@@ -37,10 +58,32 @@ class Canvas:
         self._h_margin = h_margin
         self._v_margin = v_margin
 
-        canvas_width = (max_col - min_col + 1) * (self._box_width + self._h_margin * 2)
-        canvas_height = (max_row - min_row + 1) * (self._box_height + self._v_margin * 2)
+        if viewport:
+            # the grid is drawn directly at its final position in the image
+            self._x_offset, self._y_offset = viewport.x, viewport.y
+            self._width, self._height = viewport.width, viewport.height
+        else:
+            self._x_offset, self._y_offset = 0, 0
+            self._width = (max_col - min_col + 1) * (self._box_width + self._h_margin * 2)
+            self._height = (max_row - min_row + 1) * (self._box_height + self._v_margin * 2)
+
+        self._init_drawing()
 
-        self._drawing = draw.Drawing(canvas_width, canvas_height)
+    def _get_width(self):
+        return self._width
+
+    width = property(fget=_get_width, doc="Width of the canvas in pixels.")
+
+    def _get_height(self):
+        return self._height
+
+    height = property(fget=_get_height, doc="Height of the canvas in pixels.")
+
+    def _init_drawing(self):
+        """
+        Creates the empty drawing with the size of the canvas.
+        """
+        self._drawing = draw.Drawing(self._width, self._height)
         self._drawing.append(draw.Rectangle(0, 0, '100%', '100%', rx=None, ry=None, fill='rgb(255,255,255)'))
     
     def col2x(self, col) -> int:
@@ -53,7 +96,7 @@ class Canvas:
         Retuns:
             int: The X position of the center of the box in column ` col` , in pixels. 
         """
-        return (col - self._min_col + 0.5) * (self._box_width + self._h_margin * 2)
+        return (col - self._min_col + 0.5) * (self._box_width + self._h_margin * 2) + self._x_offset
 
     def row2y(self, row: int) -> int:
         """
@@ -65,7 +108,7 @@ class Canvas:
         Retuns:
             int: The Y position of the center of the box in row ` row` , in pixels. 
         """
-        return (row - self._min_row + 0.5) * (self._box_height + self._v_margin * 2)
+        return (row - self._min_row + 0.5) * (self._box_height + self._v_margin * 2) + self._y_offset
 
 
     #def get_size(self) -> tuple[int, int]:
@@ -90,6 +133,21 @@ class Canvas:
             font_size (int): Size of the font.
             font_family (str): Name of the font.
         """
+        text_element, box_element = self._box_elements(col, row, text, color, font_size, font_family)
+
+        self._drawing.append(text_element)
+
+        if color:
+            self._drawing.append(box_element)
+
+    def _box_elements(self, col: int, row: int, text: str, color: str, font_size: int, font_family: str) -> tuple[draw.Text, draw.Rectangle]:
+        """
+        Creates the SVG elements of a box (see `add_box`).
+
+        Returns:
+            tuple (Text, Rectangle): The text and the square of the box (with no stroke if `color`
+                                     is `None`).
+        """
         mid_x = self.col2x(col)
         mid_y = self.row2y(row)
 
@@ -102,10 +160,10 @@ class Canvas:
         # shift up multiline text to center it vertically in the box
         v_shift = (len(text.split("\n")) - 1) / 2 * font_size
 
-        self._drawing.append(draw.Text(text, font_size, left_x + h_shift, mid_y - v_shift, font_family=font_family, dominant_baseline='middle'))
+        text_element = draw.Text(text, font_size, left_x + h_shift, mid_y - v_shift, font_family=font_family, dominant_baseline='middle')
+        box_element = draw.Rectangle(left_x, top_y, self._box_width, self._box_height, stroke_width=2, stroke=f"{color}" if color else "none", fill='none')
 
-        if color:
-            self._drawing.append(draw.Rectangle(left_x, top_y, self._box_width, self._box_height, stroke_width=2, stroke=f"{color}", fill='none'))
+        return text_element, box_element
 
     def add_link(self, start_col: int, start_row: int, end_col: int, end_row: int, width: int=1, color: str="black", opacity: float=0.2):
         """
@@ -123,13 +181,19 @@ class Canvas:
             color (str): Color of the line in the "#rrggbb" format.
             opacity (float): Opacity level of the line from 0 (transparent) to 1 (solid).
         """
+        self._drawing.append(self._link_element(start_col, start_row, end_col, end_row, width, color, opacity))
+
+    def _link_element(self, start_col: int, start_row: int, end_col: int, end_row: int, width: int, color: str, opacity: float) -> draw.Line:
+        """
+        Creates the SVG element of a link (see `add_link`).
+        """
         x0 = self.col2x(start_col) + self._box_width / 2
         y0 = self.row2y(start_row)
         
         x1 = self.col2x(end_col) - self._box_width / 2 
         y1 = self.row2y(end_row)
         
-        self._drawing.append(draw.Line(x0, y0, x1, y1, stroke_width=width, stroke=color, fill=color, fill_opacity=opacity))
+        return draw.Line(x0, y0, x1, y1, stroke_width=width, stroke=color, fill=color, fill_opacity=opacity)
         
     def image(self) -> draw.Drawing:
         """
@@ -139,3 +203,182 @@ class Canvas:
             draw.Drawing: Drawing object.
         """
         return Image.open(io.BytesIO(self._drawing.rasterize().png_data))
+
+    def svg(self) -> str:
+        """
+        Returns the SVG document of the drawing.
+        """
+        return self._drawing.as_svg()
+
+
+class AnimatedCanvas(Canvas):
+    """
+    SVG canvas in which each box and link is only visible from a given time on, and in which the
+    colour of the boxes changes over time (SMIL animations). It allows showing the full evolution
+    of a tree in a single SVG document whose size grows with the final tree only.
+
+    The animation restarts every `duration` seconds.
+
+    Args:
+        duration (float): Duration of the animation in seconds.
+        (other arguments as in `Canvas`)
+    """
+    # id of the animation that restarts all the others
+    CLOCK_ID = "clock"
+
+    def __init__(self, min_col: int, min_row: int, max_col: int, max_row: int, box_width: int, box_height: int, h_margin: int, v_margin: int, duration: float, viewport: Viewport=None):
+        self._duration = duration
+
+        super().__init__(min_col, min_row, max_col, max_row, box_width, box_height, h_margin, v_margin, viewport)
+
+    def _init_drawing(self):
+        super()._init_drawing()
+
+        # invisible element whose (dummy) animation is repeated forever
+        clock = draw.Rectangle(0, 0, 0, 0, fill="none")
+        clock.append_anim(draw.Animate("width", f"{self._duration}s", 0, 0, begin=f"0s;{self.CLOCK_ID}.end", id=self.CLOCK_ID))
+
+        self._drawing.append(clock)
+
+    def _set(self, attribute: str, value: str, start: float, end: float) -> draw.Set:
+        """
+        Animation that sets `attribute` to `value` from `start` to `end` in each repetition.
+        """
+        return draw.Set(attribute, f"{end - start:g}s", value, begin=f"{self.CLOCK_ID}.begin+{start:g}s")
+
+    def _reveal(self, element, start: float):
+        """
+        Hides `element` until `start`.
+        """
+        if start > 0:
+            element.args["visibility"] = "hidden"
+            element.append_anim(self._set("visibility", "visible", start, self._duration))
+
+    def add_box(self, col: int, row: int, text: str=None, color: str=None, font_size: int=10, font_family: str="Monospace", start: float=0, colors: list[tuple[float, str]]=None):
+        """
+        Add a box to the specified coordinates of the grid (see `Canvas.add_box`).
+
+        Args:
+            start (float): Time at which the box appears, in seconds.
+            colors (list[tuple[float, str]]): Times at which the colour of the box changes, in
+                                              seconds, and the new colours (`None` for no box).
+        """
+        text_element, box_element = self._box_elements(col, row, text, color, font_size, font_family)
+
+        group = draw.Group()
+        group.append(text_element)
+        group.append(box_element)
+
+        # each colour lasts until the next change
+        changes = colors if colors else []
+
+        for (change_start, change_color), (change_end, _) in zip(changes, changes[1:] + [(self._duration, None)]):
+            if change_color and change_end > change_start:
+                box_element.append_anim(self._set("stroke", change_color, change_start, change_end))
+
+        self._reveal(group, start)
+
+        self._drawing.append(group)
+
+    def add_link(self, start_col: int, start_row: int, end_col: int, end_row: int, width: int=1, color: str="black", opacity: float=0.2, start: float=0):
+        """
+        Add a line between two boxes (see `Canvas.add_link`).
+
+        Args:
+            start (float): Time at which the line appears, in seconds.
+        """
+        link_element = self._link_element(start_col, start_row, end_col, end_row, width, color, opacity)
+
+        self._reveal(link_element, start)
+
+        self._drawing.append(link_element)
+
+
+@lru_cache
+def _load_font(font_family: str, font_size: int) -> ImageFont.ImageFont:
+    """
+    Loads the font `font_family`, falling back to a monospaced font or to the default font of PIL.
+    """
+    for name in (font_family, "DejaVuSansMono.ttf"):
+        try:
+            return ImageFont.truetype(name, font_size)
+        except OSError:
+            pass
+
+    return ImageFont.load_default(font_size)
+
+
+@lru_cache(maxsize=4096)
+def _text_mask(line: str, font_family: str, font_size: int) -> tuple[Image.Image, int, int]:
+    """
+    Renders a single line of text. The lines repeat a lot between the nodes of a tree, so each one
+    is only rendered once and then pasted.
+
+    Returns:
+        tuple (Image, int, int): Mask of the text and position of its top left corner relative to
+                                 the left middle point of the text.
+    """
+    font = _load_font(font_family, font_size)
+    left, top, right, bottom = font.getbbox(line, anchor="lm")
+
+    mask = Image.new("L", (max(1, right - left), max(1, bottom - top)))
+    ImageDraw.Draw(mask).text((-left, -top), line, fill=255, font=font, anchor="lm")
+
+    return mask, left, top
+
+
+class RasterCanvas(Canvas):
+    """
+    Canvas that draws the boxes, texts and links directly into a `PIL.Image`.
+
+    It has the same API and geometry as `Canvas` but skips the SVG description and its
+    rasterization (serialize, render, encode and decode a PNG), which is much faster for large
+    trees and for movies. The lines are not antialiased and the fonts may differ slightly.
+
+    Private Attributes:
+        _image (Image): Image being drawn.
+        _draw (ImageDraw): Drawing interface of `_image`.
+    """
+    def _init_drawing(self):
+        self._image = Image.new("RGB", (int(self._width), int(self._height)), "white")
+        self._draw = ImageDraw.Draw(self._image)
+
+    def add_box(self, col: int, row: int, text: str=None, color: str=None, font_size: int=10, font_family: str="Monospace"):
+        mid_x = self.col2x(col)
+        mid_y = self.row2y(row)
+
+        left_x = mid_x - (self._box_width / 2)
+        top_y = mid_y - (self._box_height / 2)
+
+        # same placement of the text as in the SVG canvas
+        h_shift = (self._box_width * self.TEXT_INDENT_PERC)
+
+        lines = text.split("\n")
+        v_shift = (len(lines) - 1) / 2 * font_size
+
+        for i, line in enumerate(lines):
+            mask, left, top = _text_mask(line, font_family, font_size)
+
+            # rounding half up keeps the text in the same place when the grid is shifted
+            x, y = math.floor(left_x + h_shift + 0.5), math.floor(mid_y - v_shift + i * font_size + 0.5)
+
+            self._image.paste("black", (x + left, y + top), mask)
+
+        if color:
+            self._draw.rectangle((left_x, top_y, left_x + self._box_width, top_y + self._box_height), outline=color, width=2)
+
+    def add_link(self, start_col: int, start_row: int, end_col: int, end_row: int, width: int=1, color: str="black", opacity: float=0.2):
+        x0 = self.col2x(start_col) + self._box_width / 2
+        y0 = self.row2y(start_row)
+
+        x1 = self.col2x(end_col) - self._box_width / 2
+        y1 = self.row2y(end_row)
+
+        # as in the SVG canvas the opacity only applies to the fill, so the line is solid
+        self._draw.line((x0, y0, x1, y1), fill=color, width=width)
+
+    def image(self) -> Image:
+        """
+        Returns the `PIL.Image` object with the drawing.
+        """
+        return self._image
@@ -0,0 +1,198 @@
+from .alignment import Alignment, Operation, OPERATION_MOVES
+from .canvas import Canvas, Viewport
+from .layout import Layout
+
+# same order in which `Alignment.expand` generates the children
+EXPANSION_ORDER = (Operation.GAP_DOWN, Operation.MATCH, Operation.GAP_UP)
+
+
+class DAGNode:
+    """
+    Node of an `AlignmentDAG`: all the partial alignments that consumed the sequences up to the
+    same positions (i, j).
+
+    Private Attributes:
+        i, j (int): Next positions of the first and second sequences to be consumed.
+        score (int): Best score of the alignments reaching (i, j).
+        parent (DAGNode): Origin of the best incoming edge, `None` for the start node.
+        op (Operation): Operation of the best incoming edge, `None` for the start node.
+        alternatives (list[tuple[DAGNode, Operation]]): Other incoming edges, in the order they
+                                                        were found (`None` if there are none or
+                                                        they are not kept).
+    """
+    __slots__ = ("i", "j", "score", "parent", "op", "alternatives")
+
+    def __init__(self, i: int, j: int, score: int, parent: "DAGNode"=None, op: Operation=None):
+        self.i, self.j = i, j
+        self.score = score
+        self.parent, self.op = parent, op
+        self.alternatives = None
+
+    def has_parent(self, node: "DAGNode") -> bool:
+        """
+        Returns True if there is an edge from `node` to the current node.
+        """
+        return self.parent is node or any(parent is node for parent, _ in self.alternatives or ())
+
+
+class AlignmentDAG:
+    """
+    All the partial alignments of two sequences as a directed acyclic graph with a single node for
+    each positions (i, j), instead of a tree with one node for each sequence of operations.
+
+    All the alignments reaching the same positions are continued in the same way, so the tree
+    repeats the same sub tree below each of them while the graph keeps a single node with its best
+    incoming edge (and, optionally, the other ones). The graph has O(n * m) nodes while the number
+    of nodes of the tree grows exponentially.
+
+    The nodes are generated one anti-diagonal (i + j) at a time, so the best incoming edge of a node
+    is known before its children are generated.
+
+    Args:
+        seq1, seq2 (str): Sequences to be aligned.
+        vmatch, vmismatch, vgap (int): Values of the scoring scheme.
+        band (int): Optional band width. Only the nodes with |i - j| <= `band` are generated.
+        keep_alternatives (bool): Keep all the incoming edges of each node, not only the best one.
+                                  Needed to unfold the full tree (see `unfold`).
+
+    Private Attributes:
+        _start (Alignment): Empty alignment, used to score the operations.
+        _nodes (dict[tuple[int, int], DAGNode]): Node of each positions.
+    """
+    def __init__(self, seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int, band: int=None, keep_alternatives: bool=True):
+        self._start = Alignment(seq1, seq2, vmatch, vmismatch, vgap)
+        self._band = band
+        self._keep_alternatives = keep_alternatives
+
+        self._nodes = {(0, 0): DAGNode(0, 0, 0)}
+
+        n, m = len(seq1), len(seq2)
+
+        for diagonal in range(n + m + 1):
+            for i in range(max(0, diagonal - m), min(n, diagonal) + 1):
+                node = self._nodes.get((i, diagonal - i))
+
+                if node is not None:
+                    self._expand(node, n, m)
+
+    def _expand(self, node: DAGNode, n: int, m: int):
+        """
+        Adds the edges from `node` to its children, creating the children not yet generated.
+        """
+        for op in EXPANSION_ORDER:
+            inc_i, inc_j = OPERATION_MOVES[op]
+            i, j = node.i + inc_i, node.j + inc_j
+
+            if i > n or j > m or (self._band is not None and abs(i - j) > self._band):
+                continue
+
+            score = node.score + self._start._apply_op(op, node.i, node.j)[3]
+            child = self._nodes.get((i, j))
+
+            if child is None:
+                self._nodes[(i, j)] = DAGNode(i, j, score, node, op)
+                continue
+
+            # on ties the first edge found is kept as the best one
+            if score > child.score:
+                old_edge = (child.parent, child.op)
+                child.score, child.parent, child.op = score, node, op
+            else:
+                old_edge = (node, op)
+
+            if self._keep_alternatives:
+                if child.alternatives is None:
+                    child.alternatives = []
+
+                child.alternatives.append(old_edge)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def get(self, coords: tuple[int, int]) -> DAGNode:
+        """
+        Returns the node of the given positions, `None` if it was not generated (e.g. out of the
+        band).
+        """
+        return self._nodes.get(coords)
+
+    def get_alignment(self, coords: tuple[int, int]) -> Alignment:
+        """
+        Returns the best alignment reaching the given positions, following the best incoming edges
+        back to the start node.
+        """
+        node, ops = self._nodes[coords], []
+
+        while node.parent is not None:
+            ops.append(node.op)
+            node = node.parent
+
+        ops.reverse()
+
+        start = self._start
+
+        return Alignment(start._seq1, start._seq2, start._vmatch, start._vmismatch, start._vgap, ops)
+
+    def get_solution(self) -> Alignment:
+        """
+        Returns the best complete alignment of the sequences, `None` if there is none in the band.
+        """
+        coords = (len(self._start._seq1), len(self._start._seq2))
+
+        return self.get_alignment(coords) if coords in self._nodes else None
+
+    def unfold(self, best_only: bool=False, max_nodes: int=None) -> Alignment:
+        """
+        Unfolds the graph back into an alignment tree, with a node for each path from the start
+        node.
+
+        With all the incoming edges kept (see `keep_alternatives`), the tree is the same as the one
+        generated by expanding all its nodes (e.g. `AlgorithmBruteForce`), which is only feasible
+        for small sequences.
+
+        Args:
+            best_only (bool): Follow only the best incoming edges, the tree then has a single node
+                              for each positions, the best alignment reaching them.
+            max_nodes (int): Optional limit of the number of nodes of the tree.
+
+        Returns:
+            Alignment: Root of the tree, with all its nodes but the leaves expanded.
+        """
+        start = self._start
+        root = Alignment(start._seq1, start._seq2, start._vmatch, start._vmismatch, start._vgap)
+        root._band = self._band
+
+        count_nodes = 1
+        stack = [(root, self._nodes[(0, 0)])]
+
+        while stack:
+            aln, node = stack.pop()
+            children = []
+
+            for op in EXPANSION_ORDER:
+                inc_i, inc_j = OPERATION_MOVES[op]
+                child = self._nodes.get((node.i + inc_i, node.j + inc_j))
+
+                if child is not None and (child.parent is node if best_only else child.has_parent(node)):
+                    children.append((op, child))
+
+            if not children:
+                continue
+
+            count_nodes += len(children)
+            assert max_nodes is None or count_nodes <= max_nodes, f"The unfolded tree has more than {max_nodes} nodes."
+
+            aln._expanded = True
+
+            for op, child in children:
+                child_aln = aln.child_alignment_factory(op)
+                aln.add_child(child_aln)
+                stack.append((child_aln, child))
+
+        return root
+
+    def draw(self, box_width: int, box_height: int, h_margin: int, v_margin: int, layout: Layout=None, canvas_class: type[Canvas]=Canvas, viewport: Viewport=None, best_only: bool=False, max_nodes: int=None):
+        """
+        Draws the graph unfolded as a tree (see `unfold` and `Node.draw`).
+        """
+        return self.unfold(best_only, max_nodes).draw(box_width, box_height, h_margin, v_margin, layout, canvas_class, viewport)
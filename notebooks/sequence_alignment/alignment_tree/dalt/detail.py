@@ -0,0 +1,123 @@
+import heapq
+from itertools import count
+
+from .node import Node
+from .alignment import Alignment
+from .algorithm import COLOR_EXPANDED_BOX, COLOR_SOLUTION_BOX, COLOR_BEST_BOX, COLOR_IGNORED_BOX
+
+# interest of a sub tree, the sub trees with the highest values are the first to be collapsed
+KEY_NODE = 0        # contains the latest expanded node, the solution or the best node to expand
+ACTIVE = 1          # contains nodes that can still be expanded or coloured by the algorithm
+EXPLORED = 2        # fully explored or ignored
+
+KEY_COLORS = (COLOR_EXPANDED_BOX, COLOR_SOLUTION_BOX, COLOR_BEST_BOX)
+
+
+def _interest(node: Alignment) -> int:
+    """
+    Interest of a single node (see the constants above).
+    """
+    if node.color in KEY_COLORS:
+        return KEY_NODE
+
+    if (node.color is not None and node.color != COLOR_IGNORED_BOX) or node._can_expand():
+        return ACTIVE
+
+    return EXPLORED
+
+
+def _copy(node: Alignment) -> Node:
+    copy = Node(node.text)
+    copy.color = node.color
+
+    return copy
+
+
+def level_of_detail(aln: Alignment, max_boxes: int) -> Node:
+    """
+    Copies the alignment tree for drawing, collapsing the least interesting sub trees so that the
+    copy has at most `max_boxes` nodes.
+
+    As in `Alignment.compact`, a collapsed node keeps its box and its children are replaced by a
+    single node counting them. The nodes are opened from the start node down, first the ones
+    leading to the latest expanded node, the solution and the best node to expand (which are always
+    shown, even if the budget is exceeded), then the ones with nodes still to be expanded, and
+    finally the fully explored or ignored ones. Nodes of the same interest are opened by their
+    distance through the tree to the best node to expand (the number of links of the path between
+    them), or by depth if there is none.
+
+    The tree itself is not changed, so the algorithm can go on exploring it. The interest of the
+    sub trees is computed with a single traversal of the tree, and only the nodes drawn are copied.
+
+    Args:
+        aln (Alignment): Root of the tree to draw.
+        max_boxes (int): Maximum number of boxes to draw (at least 2).
+
+    Returns:
+        Node: Root of the copy, made of plain `Node` objects with the texts and colours of the
+              alignments.
+    """
+    assert max_boxes >= 2, "At least the start node and its collapsed children must be drawn."
+
+    # number of descendants and interest of the children of each node (from the leaves up)
+    descendants, inner = {}, {}
+    nodes = list(aln.walk())
+
+    for node in reversed(nodes):
+        descendants[node], inner[node] = 0, EXPLORED
+
+        for child in node._children:
+            descendants[node] += 1 + descendants[child]
+            inner[node] = min(inner[node], _interest(child), inner[child])
+
+    # ancestors of the best node to expand, the distance from a node to it is the sum of their
+    # depths minus twice the depth of their deepest common ancestor
+    best = aln.get_best_node_to_expand()
+    on_path, best_depth = {aln}, 0
+
+    while best is not None and best != aln:
+        on_path.add(best)
+        best, best_depth = best._parent, best_depth + 1
+
+    # open the most interesting nodes while the boxes fit in the budget
+    opened, boxes = set(), 1 + (1 if aln._children else 0)
+    order = count()
+    candidates = [(inner[aln], best_depth, next(order), 0, 0, aln)] if aln._children else []
+
+    while candidates:
+        interest, _, _, depth, common_depth, node = heapq.heappop(candidates)
+
+        # the collapsed node is replaced by the children, each one collapsed
+        extra = sum(2 if child._children else 1 for child in node._children) - 1
+
+        if interest != KEY_NODE and boxes + extra > max_boxes:
+            continue
+
+        boxes += extra
+        opened.add(node)
+
+        for child in node._children:
+            if child._children:
+                child_common_depth = depth + 1 if child in on_path else common_depth
+                distance = depth + 1 + best_depth - 2 * child_common_depth
+
+                heapq.heappush(candidates, (inner[child], distance, next(order), depth + 1,
+                                            child_common_depth, child))
+
+    # copy the visible nodes
+    root = _copy(aln)
+    stack = [(aln, root)]
+
+    while stack:
+        node, copy = stack.pop()
+
+        if node in opened:
+            for child in node._children:
+                child_copy = _copy(child)
+                copy.add_child(child_copy)
+                stack.append((child, child_copy))
+
+        elif node._children:
+            copy.add_child(Node(f"{descendants[node]} children"))
+
+    return root
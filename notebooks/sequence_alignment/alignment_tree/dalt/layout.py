@@ -0,0 +1,218 @@
+from .node import Node, TreeBoxCoords
+
+
+class Layout:
+    """
+    Abstract base class for all layout engines.
+
+    A layout engine computes the (col, row) coordinates of the grid in which each node of a tree
+    will be drawn. The column of a node is always its depth, the engines differ in the rows.
+
+    Concrete engines must implement the `arrange` method, which sets the `_col` and `_row` of all
+    the nodes of the tree and the `_box` of its root.
+    """
+    def arrange(self, node: Node, level: int=0) -> tuple[int, int, TreeBoxCoords]:
+        """
+        Positions all the nodes of the tree rooted in `node`, whose column will be `level`.
+
+        Returns:
+            tuple (int, int, TreeBoxCoords): Column and row of `node` and the limits of the tree.
+        """
+        assert False, 0     # pragma: no cover
+
+
+class ClassicLayout(Layout):
+    """
+    The original layout of the trees (see `Node._arrange_all`).
+
+    Args:
+        incremental (bool): Reuse the layout of the sub trees that did not change since the
+                            previous call.
+    """
+    def __init__(self, incremental: bool=False):
+        self._incremental = incremental
+
+    def arrange(self, node: Node, level: int=0) -> tuple[int, int, TreeBoxCoords]:
+        return node._arrange_all(level, incremental=self._incremental)
+
+
+class _TidyNode:
+    """
+    State of a node during the tidy layout.
+
+    Private Attributes:
+        node (Node): Node being positioned.
+        children (list[_TidyNode]): Children of the node.
+        left_sibling (_TidyNode): Previous child of the parent of the node, `None` if first.
+        first_sibling (_TidyNode): First child of the parent of the node.
+        prelim (int): Row of the node relative to its left sibling.
+        mod (int): Shift to be applied to all the descendants of the node.
+        thread (_TidyNode): Next node of the contour of a sub tree when the node is a leaf.
+    """
+    __slots__ = ("node", "children", "left_sibling", "first_sibling", "prelim", "mod", "thread")
+
+    def __init__(self, node: Node, left_sibling: "_TidyNode", first_sibling: "_TidyNode"):
+        self.node = node
+        self.children = []
+        self.left_sibling = left_sibling
+        self.first_sibling = first_sibling if first_sibling else self
+        self.prelim = 0
+        self.mod = 0
+        self.thread = None
+
+    def next_top(self) -> "_TidyNode":
+        """
+        Next node of the top contour of the sub tree (in the next column).
+        """
+        return self.children[0] if self.children else self.thread
+
+    def next_bottom(self) -> "_TidyNode":
+        """
+        Next node of the bottom contour of the sub tree (in the next column).
+        """
+        return self.children[-1] if self.children else self.thread
+
+
+class TidyLayout(Layout):
+    """
+    Tidy tree layout in O(n) time (Reingold-Tilford, with the threads of Walker's algorithm).
+
+    Each sub tree is arranged on its own and then pushed down just enough not to overlap its upper
+    siblings, comparing only their contours. Each parent is placed in the middle of its first and
+    last children. The result is usually much more compact than the classic layout.
+
+    The space left between distant siblings is not spread to the sub trees between them, so all the
+    rows stay integers.
+    """
+    def __init__(self, distance: int=1):
+        self._distance = distance
+
+    def arrange(self, node: Node, level: int=0) -> tuple[int, int, TreeBoxCoords]:
+        # the layouts cached by the classic layout don't hold any more
+        if node._parent is not None:
+            node._parent._invalidate_layout()
+
+        root = _TidyNode(node, None, None)
+        postorder = self._build(root)
+
+        for t in postorder:
+            self._first_walk(t)
+
+        min_row, max_row, max_col = self._second_walk(root, level)
+
+        # the rows start at 0 as in the classic layout
+        for t in postorder:
+            t.node._row -= min_row
+
+        node._box = TreeBoxCoords(level, 0, max_col, max_row - min_row)
+
+        return node._col, node._row, node._box
+
+    def _build(self, root: _TidyNode) -> list[_TidyNode]:
+        """
+        Creates the `_TidyNode` of all the nodes of the tree.
+
+        Returns:
+            list[_TidyNode]: The nodes in post-order (the children in order before their parent).
+        """
+        preorder, stack = [], [root]
+
+        while stack:
+            t = stack.pop()
+            preorder.append(t)
+
+            if t.node._layout is not None:
+                t.node._layout = None
+
+            left_sibling = None
+
+            for child in t.node._children:
+                left_sibling = _TidyNode(child, left_sibling, t.children[0] if t.children else None)
+                t.children.append(left_sibling)
+
+            # the last child is visited first so reversing the list puts the first child first
+            stack.extend(t.children)
+
+        preorder.reverse()
+
+        return preorder
+
+    def _first_walk(self, t: _TidyNode):
+        """
+        Computes the preliminary row of the node once all its children were arranged, and pushes
+        its sub tree down if it overlaps the sub trees of its upper siblings.
+        """
+        if t.children:
+            midpoint = (t.children[0].prelim + t.children[-1].prelim) // 2
+
+            if t.left_sibling:
+                t.prelim = t.left_sibling.prelim + self._distance
+                t.mod = t.prelim - midpoint
+            else:
+                t.prelim = midpoint
+
+        elif t.left_sibling:
+            t.prelim = t.left_sibling.prelim + self._distance
+
+        if t.left_sibling:
+            self._apportion(t)
+
+    def _apportion(self, t: _TidyNode):
+        """
+        Pushes down the sub tree of `t` until it doesn't overlap the sub trees of its upper
+        siblings, and threads the contours of the resulting sub tree.
+        """
+        # inner and outer contours of the upper (`u`) and lower (`l`) sub trees and their shifts
+        l_in = l_out = t
+        u_in, u_out = t.left_sibling, t.first_sibling
+        s_l_in = s_l_out = t.mod
+        s_u_in, s_u_out = u_in.mod, u_out.mod
+
+        while u_in.next_bottom() and l_in.next_top():
+            u_in, l_in = u_in.next_bottom(), l_in.next_top()
+            u_out, l_out = u_out.next_top(), l_out.next_bottom()
+
+            shift = (u_in.prelim + s_u_in) - (l_in.prelim + s_l_in) + self._distance
+
+            if shift > 0:
+                t.prelim += shift
+                t.mod += shift
+                s_l_in += shift
+                s_l_out += shift
+
+            s_u_in += u_in.mod
+            s_l_in += l_in.mod
+            s_u_out += u_out.mod
+            s_l_out += l_out.mod
+
+        # the shorter contour continues in the deeper one
+        if u_in.next_bottom() and not l_out.next_bottom():
+            l_out.thread = u_in.next_bottom()
+            l_out.mod += s_u_in - s_l_out
+
+        elif l_in.next_top() and not u_out.next_top():
+            u_out.thread = l_in.next_top()
+            u_out.mod += s_l_in - s_u_out
+
+    def _second_walk(self, root: _TidyNode, level: int) -> tuple[int, int, int]:
+        """
+        Sets the final coordinates of all the nodes adding the shifts of their ancestors.
+
+        Returns:
+            tuple (int, int, int): Minimum and maximum rows and maximum column of the tree.
+        """
+        min_row, max_row, max_col = root.prelim, root.prelim, level
+
+        stack = [(root, level, 0)]
+
+        while stack:
+            t, col, mod = stack.pop()
+
+            node = t.node
+            node._col, node._row = col, t.prelim + mod
+
+            min_row, max_row, max_col = min(min_row, node._row), max(max_row, node._row), max(max_col, col)
+
+            stack.extend((child, col + 1, mod + t.mod) for child in t.children)
+
+        return min_row, max_row, max_col
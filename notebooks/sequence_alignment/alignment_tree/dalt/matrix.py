@@ -0,0 +1,324 @@
+import numpy as np
+
+from .alignment import Operation, max_score_out_of_band, widen_band
+
+
+def _encode(seq: str) -> np.ndarray:
+    """
+    Converts a sequence into an array of character codes.
+    """
+    return np.frombuffer(seq.encode("utf-32-le"), dtype=np.uint32)
+
+
+def substitution_matrix(seq1: str, seq2: str, vmatch: int, vmismatch: int) -> np.ndarray:
+    """
+    Computes the score of aligning each character of `seq1` with each character of `seq2`.
+
+    Returns:
+        np.ndarray: Matrix of shape (len(seq1), len(seq2)).
+    """
+    return np.where(_encode(seq1)[:, None] == _encode(seq2)[None, :], vmatch, vmismatch).astype(np.int64)
+
+
+def score_matrix(seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int) -> np.ndarray:
+    """
+    Fills the Needleman-Wunsch dynamic programming matrix.
+
+    The cell (i, j) holds the best score of the alignments of the first `i` characters of `seq1`
+    with the first `j` characters of `seq2`, i.e. of the alignments with coordinates (i, j).
+
+    The cells of each anti-diagonal (i + j constant) only depend on the two previous anti-diagonals,
+    so the matrix is filled one anti-diagonal at a time with vectorized operations (wavefront).
+
+    Returns:
+        np.ndarray: Matrix of shape (len(seq1) + 1, len(seq2) + 1).
+    """
+    n, m = len(seq1), len(seq2)
+
+    subst = substitution_matrix(seq1, seq2, vmatch, vmismatch)
+
+    scores = np.empty((n + 1, m + 1), dtype=np.int64)
+    scores[:, 0] = np.arange(n + 1) * vgap
+    scores[0, :] = np.arange(m + 1) * vgap
+
+    for d in range(2, n + m + 1):
+        # cells of the anti-diagonal `d` not in the first row or column
+        i = np.arange(max(1, d - m), min(n, d - 1) + 1)
+        j = d - i
+
+        scores[i, j] = np.maximum(
+            scores[i - 1, j - 1] + subst[i - 1, j - 1],
+            np.maximum(scores[i - 1, j], scores[i, j - 1]) + vgap
+        )
+
+    return scores
+
+
+def traceback(seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int, scores: np.ndarray) -> list[Operation]:
+    """
+    Recovers the operations of an optimal alignment from a filled score matrix.
+
+    When many optimal alignments exist, matches are preferred to gaps and gaps in the second
+    sequence (`Operation.GAP_DOWN`) to gaps in the first one (`Operation.GAP_UP`).
+
+    Returns:
+        list[Operation]: Operations of the alignment, from the first to the last.
+    """
+    ops = []
+    i, j = len(seq1), len(seq2)
+
+    while i > 0 or j > 0:
+        score = scores[i, j]
+
+        if i > 0 and j > 0 and score == scores[i - 1, j - 1] + (vmatch if seq1[i - 1] == seq2[j - 1] else vmismatch):
+            ops.append(Operation.MATCH)
+            i, j = i - 1, j - 1
+
+        elif i > 0 and score == scores[i - 1, j] + vgap:
+            ops.append(Operation.GAP_DOWN)
+            i -= 1
+
+        else:
+            ops.append(Operation.GAP_UP)
+            j -= 1
+
+    ops.reverse()
+
+    return ops
+
+
+def global_alignment(seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int) -> tuple[int, list[Operation]]:
+    """
+    Computes an optimal global alignment of `seq1` and `seq2` (Needleman-Wunsch).
+
+    Returns:
+        tuple (int, list[Operation]): The score of the alignment and its operations.
+    """
+    scores = score_matrix(seq1, seq2, vmatch, vmismatch, vgap)
+
+    return int(scores[-1, -1]), traceback(seq1, seq2, vmatch, vmismatch, vgap, scores)
+
+
+def last_row(seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int) -> np.ndarray:
+    """
+    Computes the last row of the Needleman-Wunsch matrix keeping a single row in memory.
+
+    Within a row the gaps in `seq1` chain from left to right. With a linear gap penalty that chain
+    is a running maximum of `t[k] - k * vgap`, so each row is computed with vectorized operations.
+
+    Returns:
+        np.ndarray: Best scores of the alignments of `seq1` with each prefix of `seq2`.
+    """
+    codes2 = _encode(seq2)
+    gaps = np.arange(len(seq2) + 1, dtype=np.int64) * vgap
+
+    row = gaps.copy()
+    up, t = np.empty_like(row), np.empty_like(row)
+
+    # the substitution scores only depend on the character of `seq1`
+    substs = {}
+
+    for code in _encode(seq1):
+        if code not in substs:
+            substs[code] = np.where(codes2 == code, vmatch, vmismatch).astype(np.int64)
+
+        # best score without a gap in `seq1` at the end (computed in place to avoid allocations)
+        np.add(row, vgap, out=up)
+        np.add(row[:-1], substs[code], out=t[1:])
+        np.maximum(t[1:], up[1:], out=t[1:])
+        t[0] = up[0]
+
+        np.subtract(t, gaps, out=t)
+        np.maximum.accumulate(t, out=row)
+        np.add(row, gaps, out=row)
+
+    return row
+
+
+# below this number of cells the full matrix is used instead of splitting the problem
+HIRSCHBERG_MIN_CELLS = 4096
+
+
+def hirschberg(seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int) -> list[Operation]:
+    """
+    Computes the operations of an optimal global alignment in linear space (Hirschberg).
+
+    The first sequence is split in half and the best split point of the second sequence is found
+    combining the last row of the forward alignment of the first half with the last row of the
+    backward alignment of the second half. Each half is then aligned recursively.
+
+    Returns:
+        list[Operation]: Operations of the alignment, from the first to the last.
+    """
+    n, m = len(seq1), len(seq2)
+
+    if n == 0 or m == 0:
+        return [Operation.GAP_DOWN] * n + [Operation.GAP_UP] * m
+
+    if n == 1 or (n + 1) * (m + 1) <= HIRSCHBERG_MIN_CELLS:
+        scores = score_matrix(seq1, seq2, vmatch, vmismatch, vgap)
+
+        return traceback(seq1, seq2, vmatch, vmismatch, vgap, scores)
+
+    mid = n // 2
+
+    forward = last_row(seq1[:mid], seq2, vmatch, vmismatch, vgap)
+    backward = last_row(seq1[mid:][::-1], seq2[::-1], vmatch, vmismatch, vgap)
+
+    split = int(np.argmax(forward + backward[::-1]))
+
+    return hirschberg(seq1[:mid], seq2[:split], vmatch, vmismatch, vgap) + \
+           hirschberg(seq1[mid:], seq2[split:], vmatch, vmismatch, vgap)
+
+
+def alignment_score(seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int, ops: list[Operation]) -> int:
+    """
+    Computes the score of the alignment given by the operations `ops`.
+    """
+    score, i, j = 0, 0, 0
+
+    for op in ops:
+        if op == Operation.MATCH:
+            score += vmatch if seq1[i] == seq2[j] else vmismatch
+            i, j = i + 1, j + 1
+        else:
+            score += vgap
+            i, j = (i + 1, j) if op == Operation.GAP_DOWN else (i, j + 1)
+
+    return score
+
+
+def linear_global_alignment(seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int) -> tuple[int, list[Operation]]:
+    """
+    Computes an optimal global alignment of `seq1` and `seq2` in O(n + m) memory (Hirschberg).
+
+    Returns:
+        tuple (int, list[Operation]): The score of the alignment and its operations.
+    """
+    ops = hirschberg(seq1, seq2, vmatch, vmismatch, vgap)
+
+    return alignment_score(seq1, seq2, vmatch, vmismatch, vgap, ops), ops
+
+
+# score of the cells outside the band (low enough to never be selected, high enough not to overflow)
+_NO_SCORE = -2**40
+
+
+def banded_score_matrix(seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int, band: int) -> np.ndarray:
+    """
+    Fills the Needleman-Wunsch matrix only for the cells with |i - j| <= `band`, in O(band * n) time
+    and memory.
+
+    The cell (i, j) is stored in the position (i, j - i + band) of the banded matrix. Each row is
+    computed with vectorized operations as in `last_row`.
+
+    Returns:
+        np.ndarray: Banded matrix of shape (len(seq1) + 1, 2 * band + 1). The cells outside the
+                    matrix hold `_NO_SCORE`.
+    """
+    n, m = len(seq1), len(seq2)
+    width = 2 * band + 1
+
+    # the codes of `seq2` are padded so that any column of the band can be indexed
+    codes1 = _encode(seq1)
+    codes2 = np.concatenate((np.full(band + 1, -1, dtype=np.int64), _encode(seq2).astype(np.int64), np.full(n + band + 1, -1, dtype=np.int64)))
+
+    offsets = np.arange(width)
+    gaps = offsets.astype(np.int64) * vgap
+
+    scores = np.full((n + 1, width), _NO_SCORE, dtype=np.int64)
+
+    # first row: j = c - band
+    j = offsets - band
+    valid = (j >= 0) & (j <= m)
+    scores[0, valid] = j[valid] * vgap
+
+    t = np.empty(width, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        j = i + offsets - band
+        valid = (j >= 0) & (j <= m)
+
+        prev = scores[i - 1]
+        subst = np.where(codes2[j + band] == codes1[i - 1], vmatch, vmismatch)
+
+        # (i - 1, j - 1) is in the same offset of the previous row and (i - 1, j) in the next one
+        t[:] = prev + subst
+        np.maximum(t[:-1], prev[1:] + vgap, out=t[:-1])
+
+        # first column
+        if 0 <= band - i:
+            t[band - i] = i * vgap
+
+        t[~valid] = _NO_SCORE
+
+        row = np.maximum.accumulate(t - gaps) + gaps
+        row[~valid] = _NO_SCORE
+
+        scores[i] = row
+
+    return scores
+
+
+def banded_traceback(seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int, band: int, scores: np.ndarray) -> list[Operation]:
+    """
+    Same as `traceback` for a banded matrix filled by `banded_score_matrix`.
+    """
+    ops = []
+    i, j = len(seq1), len(seq2)
+
+    def score(i, j):
+        c = j - i + band
+
+        return scores[i, c] if 0 <= c < scores.shape[1] else _NO_SCORE
+
+    while i > 0 or j > 0:
+        current = score(i, j)
+
+        if i > 0 and j > 0 and current == score(i - 1, j - 1) + (vmatch if seq1[i - 1] == seq2[j - 1] else vmismatch):
+            ops.append(Operation.MATCH)
+            i, j = i - 1, j - 1
+
+        elif i > 0 and current == score(i - 1, j) + vgap:
+            ops.append(Operation.GAP_DOWN)
+            i -= 1
+
+        else:
+            ops.append(Operation.GAP_UP)
+            j -= 1
+
+    ops.reverse()
+
+    return ops
+
+
+def banded_global_alignment(seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int, band: int) -> tuple[int, list[Operation], int]:
+    """
+    Computes an optimal global alignment of `seq1` and `seq2` only exploring the cells with
+    |i - j| <= `band`. Very fast for near identical sequences.
+
+    If an alignment outside the band may score better than the one found (see
+    `max_score_out_of_band`) the band is doubled and the alignment recomputed, so the result is
+    always optimal.
+
+    Returns:
+        tuple (int, list[Operation], int): The score of the alignment, its operations and the band
+                                           width finally used (`None` if the full matrix was used).
+    """
+    n, m = len(seq1), len(seq2)
+
+    # the band must at least include the final position
+    band = max(band, abs(n - m))
+
+    while band is not None:
+        scores = banded_score_matrix(seq1, seq2, vmatch, vmismatch, vgap, band)
+        score = int(scores[n, m - n + band])
+
+        bound = max_score_out_of_band(n, m, vmatch, vmismatch, vgap, band)
+
+        if bound is None or score >= bound:
+            return score, banded_traceback(seq1, seq2, vmatch, vmismatch, vgap, band, scores), band
+
+        band = widen_band(band, n, m)
+
+    return *global_alignment(seq1, seq2, vmatch, vmismatch, vgap), None
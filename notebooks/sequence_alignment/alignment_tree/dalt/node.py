@@ -2,7 +2,7 @@ from dataclasses import dataclass
 
 from PIL import Image
 
-from .canvas import Canvas
+from .canvas import Canvas, Viewport
 
 @dataclass
 class TreeBoxCoords:
@@ -16,7 +16,9 @@ class Node:
     """
     This class represents a node of a tree that can be drawn in the canvas.
 
-    It implements a recursive positioning algorithm that assigns a column and a row to each node.
+    It implements a positioning algorithm that assigns a column and a row to each node. The tree is
+    positioned and drawn with iterative traversals (an explicit stack instead of recursion), so deep
+    trees don't hit the recursion limit.
 
     Args:
         text (str): Text to be shown in the tree.
@@ -24,8 +26,13 @@ class Node:
 
     Private Attributes:
         _children (list[Node]): List of the children of the current node.
+        _parent (Node): Parent of the current node, `None` for the root.
         _col (int): Column to be assigned to the `Node` before drawing the full tree.
         _row (int): Row to be assigned to the `Node` before drawing the full tree.
+        _layout (tuple): Layout of the sub tree cached by the incremental layout (see
+                         `_arrange_all`), `None` if the sub tree changed since it was arranged.
+        _aggregate (tuple): Values computed over the sub tree (see `_compute_aggregate`), `None`
+                            if the sub tree changed since they were computed.
     """
     def __init__(self, text: str="", color: str=None):
         self._text = text
@@ -33,7 +40,9 @@ class Node:
 
         # by default a node is a root when it's created
         self._id = "*"
-
+        self._parent = None
+        self._layout = None
+        self._aggregate = None
 
         self.reset()
 
@@ -43,6 +52,31 @@ class Node:
         self._xy = None
         self._color = None
 
+        self._invalidate_layout()
+        self._invalidate_aggregate()
+
+    def _invalidate_aggregate(self):
+        """
+        Discards the cached aggregate values of the node and of all its ancestors.
+        """
+        node = self
+
+        # the ancestors of a node without cached values have no cached values either
+        while node is not None and node._aggregate is not None:
+            node._aggregate = None
+            node = node._parent
+
+    def _invalidate_layout(self):
+        """
+        Discards the cached layout of the node and of all its ancestors, whose sub trees changed.
+        """
+        node = self
+
+        # the ancestors of a node without cached layout have no cached layout either
+        while node is not None and node._layout is not None:
+            node._layout = None
+            node = node._parent
+
     def _get_color(self):
         return self._color
 
@@ -75,9 +109,13 @@ class Node:
             child (Node): Node to be added as a child.
         """
         self._children.append(child)
+        child._parent = self
 
         # set the id of the child based on it's own id
         child._id = f"{self._id}.{len(self._children)}"
+
+        self._invalidate_layout()
+        self._invalidate_aggregate()
         
         return self
             
@@ -113,13 +151,57 @@ class Node:
         for i in range(count_leaf):
             self._children[first_leaf + i]._row = start_non_leaf_row + (step * i) + 1
             
-    def _arrange_all(self, level: int=0, _next_free_row: list[int]=None, _min_free_row: int=0):
+    def _arrange_all(self, level: int=0, _next_free_row: list[int]=None, _min_free_row: int=0, incremental: bool=False):
         """
         Computes the (row, col) coordinates of the grid in which the node will be drawn. This
         coordinates will be later converted to absolute (x, y) canvas coordinates.
+
+        The tree is traversed depth-first with an explicit stack: each node is first "entered" to
+        get its initial position and, after all its children were arranged, "exited" to adjust its
+        position to the children.
+
+        The position of a sub tree only depends on its own nodes, on its level, on the minimum free
+        row given by its parent and on the next free rows of the levels it spans. In `incremental`
+        mode these inputs are cached in each node with the resulting next free rows, and a sub tree
+        that did not change since it was last arranged (see `_invalidate_layout`) and finds the same
+        inputs is not traversed again. The result is the same as a full layout.
         """
         _next_free_row = _next_free_row if _next_free_row else []
-        
+
+        # the layouts cached in the ancestors don't hold once the node is arranged on its own
+        if self._parent is not None:
+            self._parent._invalidate_layout()
+
+        # stack of (node, level, minimum free row, layout inputs), `None` as level marks the exit
+        # of the node, which carries the inputs of the layout of its sub tree
+        stack = [(self, level, _min_free_row, None)]
+
+        while stack:
+            node, level, min_free_row, inputs = stack.pop()
+
+            if level is None:
+                node._arrange_exit(_next_free_row, inputs)
+            else:
+                node._arrange_enter(level, _next_free_row, min_free_row, stack, incremental)
+
+        return self._col, self._row, self._box
+
+    def _arrange_enter(self, level: int, _next_free_row: list[int], _min_free_row: int, stack: list, incremental: bool):
+        """
+        Computes the initial position of the node and schedules its children (see `_arrange_all`).
+        """
+        if incremental:
+            if self._reuse_layout(level, _min_free_row, _next_free_row):
+                return
+
+            inputs = (level, _min_free_row, tuple(_next_free_row[level:]))
+        else:
+            inputs = None
+
+            # the cached layout won't match the position computed now
+            if self._layout is not None:
+                self._layout = None
+
         if len(_next_free_row) <= level:
             # initialize the next free row for this depth level
             _next_free_row.append(0)
@@ -131,71 +213,145 @@ class Node:
         # the tree box starts with it's own coordinates
         self._box = TreeBoxCoords(self._col, self._row, self._col, self._row)
 
-        if not self.is_leaf():
+        children = self._children
+
+        if children:
             # get the index of the middle children to help balance the tree
-            mid_child_ndx = int(len(self._children) / 2)
-            
-            for i, child in enumerate(self._children):
-                child_col, child_row, child_box = child._arrange_all(level + 1, _next_free_row, self._row - mid_child_ndx)
-
-                # adjusts the own node row to align with the middle children
-                #if mid_child_ndx == i:
-                #    self._row = max(self._row, child_row)
-
-                # update the tree box coordinates given the new children tree box.
-                self._box = TreeBoxCoords(
-                    min(self._box.min_col, child_box.min_col),
-                    min(self._box.min_row, child_box.min_row),
-                    max(self._box.max_col, child_box.max_col),
-                    max(self._box.max_row, child_box.max_row)
-                )
-
-            """
-            Rebalance the leaf nodes.
-
-            This is a complicated way to guarantee that leaf nodes are not too close to their upper
-            siblings.
-            """
-            first_leaf, count_leaf, start_non_leaf_row = None, 0, None
-
-            for i, child in enumerate(self._children):
-                if child.is_leaf():
-                    first_leaf = i if first_leaf is None else first_leaf
-                    count_leaf += 1
-                else:
-                    if count_leaf:
-                        self._rearrange_leaf_children(first_leaf, count_leaf, start_non_leaf_row, self._children[i]._row)
-                        
-                    # reinitialize
-                    first_leaf, count_leaf, start_non_leaf_row = None, 0, self._children[i]._row
-
-            if count_leaf and start_non_leaf_row:
-                self._rearrange_leaf_children(first_leaf, count_leaf, start_non_leaf_row, None)
-
-            # re-adjusts the own node row to align with the middle children (if changed)
-            for i, child in enumerate(self._children):
-                if mid_child_ndx == i:
-                    self._row = max(self._row, child._row)
-            # -----------------------------------------
+            mid_child_ndx = int(len(children) / 2)
+
+            stack.append((self, None, None, inputs))
+
+            # the children are arranged in order after the node, and before its exit
+            for child in reversed(children):
+                stack.append((child, level + 1, self._row - mid_child_ndx, None))
+        else:
+            # update the free row for the next node in this column.
+            _next_free_row[level] = self._row + 1
+
+            if inputs:
+                self._cache_layout(inputs, 1, _next_free_row)
+
+    def _reuse_layout(self, level: int, _min_free_row: int, _next_free_row: list[int]) -> bool:
+        """
+        Restores the cached layout of the sub tree if it was computed with the same inputs.
+
+        Returns:
+            bool: True if the layout was reused, and the sub tree must not be arranged again.
+        """
+        if self._layout is None:
+            return False
+
+        (cached_level, cached_min_free_row, cached_rows), row, next_rows = self._layout
+
+        if cached_level != level or cached_min_free_row != _min_free_row:
+            return False
+
+        count = len(cached_rows)
+        rows = tuple(_next_free_row[level:level + count])
+
+        # the levels not reached yet have 0 as next free row
+        if rows + (0,) * (count - len(rows)) != cached_rows:
+            return False
+
+        # the nodes below kept their positions, only the row of the node can be changed by its parent
+        self._row = row
+
+        _next_free_row[level:level + count] = next_rows
+
+        return True
+
+    def _cache_layout(self, inputs: tuple, count: int, _next_free_row: list[int]):
+        """
+        Caches the layout of the sub tree, spanning `count` levels, once it's arranged.
+        """
+        level, min_free_row, rows = inputs
+        rows = rows[:count] + (0,) * (count - len(rows))
+
+        self._layout = ((level, min_free_row, rows), self._row, tuple(_next_free_row[level:level + count]))
+
+    def _arrange_exit(self, _next_free_row: list[int], inputs: tuple):
+        """
+        Adjusts the position of the node to its arranged children (see `_arrange_all`).
+        """
+        children = self._children
+        mid_child_ndx = int(len(children) / 2)
+
+        for child in children:
+            child_box = child._box
+
+            # update the tree box coordinates given the new children tree box.
+            self._box = TreeBoxCoords(
+                min(self._box.min_col, child_box.min_col),
+                min(self._box.min_row, child_box.min_row),
+                max(self._box.max_col, child_box.max_col),
+                max(self._box.max_row, child_box.max_row)
+            )
+
+        """
+        Rebalance the leaf nodes.
+
+        This is a complicated way to guarantee that leaf nodes are not too close to their upper
+        siblings.
+        """
+        first_leaf, count_leaf, start_non_leaf_row = None, 0, None
+
+        for i, child in enumerate(children):
+            if child.is_leaf():
+                first_leaf = i if first_leaf is None else first_leaf
+                count_leaf += 1
+            else:
+                if count_leaf:
+                    self._rearrange_leaf_children(first_leaf, count_leaf, start_non_leaf_row, children[i]._row)
+
+                # reinitialize
+                first_leaf, count_leaf, start_non_leaf_row = None, 0, children[i]._row
+
+        if count_leaf and start_non_leaf_row:
+            self._rearrange_leaf_children(first_leaf, count_leaf, start_non_leaf_row, None)
+
+        # re-adjusts the own node row to align with the middle children (if changed)
+        self._row = max(self._row, children[mid_child_ndx]._row)
 
         # update the free row for the next node in this column.
-        _next_free_row[level] = self._row + 1
+        _next_free_row[self._col] = self._row + 1
 
-        return self._col, self._row, self._box
+        if inputs:
+            self._cache_layout(inputs, 1 + max(len(child._layout[2]) for child in children), _next_free_row)
+
+    def walk(self):
+        """
+        Iterates over all the nodes of the sub tree rooted in the current node, in depth-first order
+        (the node before its children, and the children in order).
+        """
+        stack = [self]
+
+        while stack:
+            node = stack.pop()
+
+            yield node
+
+            stack.extend(reversed(node._children))
 
     def _draw_all(self, canvas):           
         """
-        TODO: Document
+        Adds the boxes of all the nodes of the sub tree, and the links between them, to the canvas.
         """
-        canvas.add_box(self._col, self._row, self.text, self.color)
+        # stack of (parent, node) pairs: the link to the node is drawn just before the node itself
+        stack = [(None, self)]
+
+        while stack:
+            parent, node = stack.pop()
+
+            if parent is not None:
+                canvas.add_link(parent._col, parent._row, node._col, node._row)
 
-        for child in self._children:
-            canvas.add_link(self._col, self._row, child._col, child._row)
-            child._draw_all(canvas)
+            canvas.add_box(node._col, node._row, node.text, node.color)
 
-        self._xy = canvas.col2x(self._col), canvas.row2y(self._row)
+            node._xy = canvas.col2x(node._col), canvas.row2y(node._row)
 
-    def draw(self, box_width: int, box_height: int, h_margin: int, v_margin: int) -> Image:
+            stack.extend((node, child) for child in reversed(node._children))
+
+    def draw(self, box_width: int, box_height: int, h_margin: int, v_margin: int, layout: "Layout"=None, canvas_class: type[Canvas]=Canvas, viewport: Viewport=None) -> Image:
         """
         This method returns an image with a tree rooted in the current node. Additionally it can
         save the image into a file.
@@ -206,7 +362,12 @@ class Node:
         Args:
             box_width, box_height (int): Dimensions of the box to be drawn for each node, in pixels.
             h_margin, v_margin (int): Space between the boxes, in pixels.
-            image_file (str): Name of the file where o save the tree.
+            layout (Layout): Layout engine used to position the nodes (see `layout.py`). By default
+                             the nodes are positioned by `_arrange_all`.
+            canvas_class (type[Canvas]): Class of the canvas to draw on, `Canvas` (SVG) or
+                                         `RasterCanvas` (drawn directly in the image).
+            viewport (Viewport): Position of the tree in the image and size of the image. By
+                                 default the image has the size of the tree.
 
         Returns:
             A `PIL.Image` object with the image.
@@ -214,10 +375,10 @@ class Node:
         """
 
         # positions all nodes in a grid
-        _, _, box = self._arrange_all()
+        _, _, box = layout.arrange(self) if layout else self._arrange_all()
         
         # initializes the drawing canvas
-        self._canvas = Canvas(box.min_col, box.min_row, box.max_col, box.max_row, box_width, box_height, h_margin, v_margin)
+        self._canvas = canvas_class(box.min_col, box.min_row, box.max_col, box.max_row, box_width, box_height, h_margin, v_margin, viewport)
 
         # adds the node (and children) to the canvas
         self._draw_all(self._canvas)
@@ -236,58 +397,97 @@ class Node:
 
     def _draw_text_all(self, _level: int=0):
         """
-        Prints the information for each node and, recursively, traverse all children.
+        Prints the information for each node and all its descendants.
 
         Args:
-            _level (int): Depth of recursion. Used to ident the text.
+            _level (int): Depth of the node. Used to ident the text.
         """
+        stack = [(self, _level)]
 
-        txt = self.text.replace('\n', '<nl>')
-        color = f"[{self.color}]" if self.color else ""
+        while stack:
+            node, level = stack.pop()
 
-        print(f"{self._id}: {'  ' * _level}{txt} ({self._col} x {self._row}) {color}")
-        
-        for child in self._children:
-            child._draw_text_all(_level + 1)
+            txt = node.text.replace('\n', '<nl>')
+            color = f"[{node.color}]" if node.color else ""
+
+            print(f"{node._id}: {'  ' * level}{txt} ({node._col} x {node._row}) {color}")
 
-    def draw_text(self):
+            stack.extend((child, level + 1) for child in reversed(node._children))
+
+    def draw_text(self, layout: "Layout"=None):
         """
         Prints a textual representation of the tree. Assuming the current node as the tree's root.
+
+        Args:
+            layout (Layout): Layout engine used to position the nodes (see `draw`).
         """
 
         # positions all nodes in a grid
-        col, row, box = self._arrange_all()
+        col, row, box = layout.arrange(self) if layout else self._arrange_all()
 
         print("------------------------")
         print(f"Root node: {col} x {row}")
         print(f"Box limits: [{box.min_col} x {box.min_row}] - [{box.max_col} x {box.max_row}]")
         print("------------------------")
 
-        # call the recursive function that will actually print
+        # print all the nodes, traversing the tree with an explicit stack
         self._draw_text_all()
 
     def _count_children_all(self, root):
         # not to count the node calling the function
         count = 0 if root else 1
 
-        for child in self._children:
-            count += child._count_children_all(False)
+        for node in self.walk():
+            count += len(node._children)
 
         return count
 
+    def _compute_aggregate(self, children: list["Node"]) -> tuple:
+        """
+        Computes the aggregate values of the sub tree from the (already computed) values of the
+        children. Sub classes extend the tuple with their own values.
+
+        Returns:
+            tuple (int): Number of nodes in the sub tree, excluding the current node.
+        """
+        return (sum(1 + child._aggregate[0] for child in children),)
+
+    def _get_aggregate(self) -> tuple:
+        """
+        Returns the aggregate values of the sub tree (see `_compute_aggregate`).
+
+        The values of each sub tree are cached, so only the sub trees that changed since the
+        previous call are computed again.
+        """
+        stack = [self] if self._aggregate is None else []
+
+        while stack:
+            node = stack[-1]
+            children = node._children
+
+            # the children are computed before their parent
+            pending = [child for child in children if child._aggregate is None]
+
+            if pending:
+                stack.extend(pending)
+            else:
+                node._aggregate = node._compute_aggregate(children)
+                stack.pop()
+
+        return self._aggregate
+
     def count_children(self):
-        return self._count_children_all(True)
+        """
+        Returns the number of nodes in the sub tree, excluding the current node.
+        """
+        return self._get_aggregate()[0]
 
     def _get_by_level_all(self, level):
-        nodes = []
-
-        if level == 0:
-            nodes.append(self)
-        else:
-            nodes = []
+        # nodes of each level, from the current node down to the requested level
+        nodes = [self] if level >= 0 else []
 
-            for child in self._children:
-                nodes += child._get_by_level_all(level - 1)
+        for _ in range(level):
+            nodes = [child for node in nodes for child in node._children]
 
         return nodes
 
@@ -1,12 +1,21 @@
 import math
 import os
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from time import perf_counter
 
-from PIL import Image
+import numpy as np
+from PIL import Image, ImageChops
 from tqdm import tqdm
 
 from .alignment import Alignment
-from .algorithm import Algorithm
+from .algorithm import Algorithm, Budget, SearchResult
+from .canvas import Canvas, AnimatedCanvas, Viewport
+from .detail import level_of_detail
+from .layout import Layout, ClassicLayout
+from .node import TreeBoxCoords
+from .stats import Observer, PhaseStats
 
 BOX_WIDTH = 80
 BOX_HEIGHT = 35
@@ -24,23 +33,204 @@ class MovieFrame:
     def save(self, file_name):
         self.img.save(file_name)
 
+
+@dataclass
+class FrameSnapshot:
+    """
+    Everything needed to draw a frame, without the tree, so it can be drawn in another process.
+
+    The nodes are kept in depth-first order as tuples (col, row, text, color, parent) where
+    `parent` is the index of the parent node in the list (-1 for the start node).
+    """
+    box: TreeBoxCoords
+    nodes: list[tuple[int, int, str, str, int]]
+    viewport: Viewport
+    canvas_class: type[Canvas]
+    end: bool
+    steps: int
+
+
+def _draw_snapshot(snapshot: FrameSnapshot, report=None) -> MovieFrame:
+    """
+    Draws a frame from its snapshot, in the same way as `Node.draw`.
+
+    Args:
+        report (callable): Optional function called with the name of each phase of the drawing, the
+                           time it started and the steps of the frame (see
+                           `Simulation._report_phase`).
+    """
+    start = perf_counter()
+    box, nodes = snapshot.box, snapshot.nodes
+
+    canvas = snapshot.canvas_class(box.min_col, box.min_row, box.max_col, box.max_row, BOX_WIDTH, BOX_HEIGHT, H_MARGIN, V_MARGIN, snapshot.viewport)
+
+    for col, row, text, color, parent in nodes:
+        if parent >= 0:
+            canvas.add_link(nodes[parent][0], nodes[parent][1], col, row)
+
+        canvas.add_box(col, row, text, color)
+
+    if report is not None:
+        report("draw", start, snapshot.steps)
+
+    start = perf_counter()
+    img = canvas.image()
+
+    if report is not None:
+        report("rasterize", start, snapshot.steps)
+
+    root_col, root_row = nodes[0][0], nodes[0][1]
+
+    return MovieFrame(img, canvas.col2x(root_col), canvas.row2y(root_row), snapshot.end, snapshot.steps)
+
+
+def _box_geometry(box: TreeBoxCoords, root_col: int, root_row: int) -> tuple[float, float, int, int]:
+    """
+    Computes the position of the start node and the size of the image of a tree without drawing it.
+
+    Args:
+        box (TreeBoxCoords): Grid coordinates occupied by the tree.
+        root_col, root_row (int): Grid coordinates of the start node.
+
+    Returns:
+        tuple (float, float, int, int): The x and y of the start node and the width and height
+                                        of the image.
+    """
+    # nothing is drawn in the canvas, it's only used for the conversion to pixels
+    canvas = Canvas(box.min_col, box.min_row, box.max_col, box.max_row, BOX_WIDTH, BOX_HEIGHT, H_MARGIN, V_MARGIN)
+
+    return canvas.col2x(root_col), canvas.row2y(root_row), canvas.width, canvas.height
+
+
 count = 0
 
+def _movie_viewport(geometries) -> tuple[int, int, int, int]:
+    """
+    Computes the size of the frames of a movie so that they all fit and the start node appears
+    allways in the same position.
+
+    Args:
+        geometries (iterable): Tuples (root_x, root_y, width, height) with the position of the start
+                               node and the size of each frame.
+
+    Returns:
+        tuple (int, int, int, int): Minimum x and y coordinates relative to the start node and
+                                    the width and height of the frames.
+    """
+    min_x, min_y, max_x, max_y = math.inf, math.inf, -math.inf, -math.inf
+
+    for root_x, root_y, width, height in geometries:
+        min_x, min_y = min(min_x, -root_x), min(min_y, -root_y)
+        max_x, max_y = max(max_x, width - root_x), max(max_y, height - root_y)
+
+    return min_x, min_y, max_x - min_x, max_y - min_y
+
+
+def _center_frame(frame, min_x, min_y, width, height):
+    """
+    Adds a white margin to the image of the frame to center it in the viewport of the movie (see
+    `_movie_viewport`).
+
+    from: https://note.nkmk.me/en/python-pillow-add-margin-expand-canvas/
+    """
+    # shifts the coordinates to align with the start node
+    x_shift = -frame.root_x - min_x
+    y_shift = -frame.root_y - min_y
+
+    new_img = Image.new(frame.img.mode, (int(width), int(height)), (255, 255, 255))
+    new_img.paste(frame.img, (int(x_shift), int(y_shift)))
+
+    frame.img = new_img
+
+
+# number of colours of the palettes of the GIF and PNG files
+_MAX_PALETTE_COLORS = 256
+
+
+def _quantize_frames(images, colors) -> list[Image]:
+    """
+    Converts the images to a single palette with at most `colors` colours.
+
+    Consecutive frames are almost identical, so only the region of each frame that changed from
+    the previous one is converted and pasted on a copy of the previous converted frame.
+
+    The frames usually have few colours. In that case each pixel is replaced by the index of its
+    colour in the palette, so the conversion is exact (`Image.quantize` rounds the colours).
+
+    Returns:
+        list[Image]: The images in "P" mode.
+    """
+    images = [img if img.mode == "RGB" else img.convert("RGB") for img in images]
+
+    # region of each frame that changed from the previous frame (`None` if none)
+    boxes = [(0, 0) + images[0].size] + [ImageChops.difference(previous, img).getbbox() for previous, img in zip(images, images[1:])]
+
+    unique = set()
+
+    for img, box in zip(images, boxes):
+        if box:
+            region = img.crop(box)
+            unique.update(color for _, color in region.getcolors(region.width * region.height))
+
+    if len(unique) > colors:
+        sample = Image.new("RGB", (len(unique), 1))
+        sample.putdata(list(unique))
+        palette_img = sample.quantize(colors)
+
+        def convert(region):
+            return region.quantize(palette=palette_img, dither=Image.Dither.NONE)
+    else:
+        # colours packed as 0xRRGGBB, sorted to be searched
+        keys = np.array(sorted((r << 16) | (g << 8) | b for r, g, b in unique), dtype=np.uint32)
+        palette = [value for key in keys.tolist() for value in ((key >> 16) & 255, (key >> 8) & 255, key & 255)]
+
+        def convert(region):
+            rgb = np.asarray(region, dtype=np.uint32)
+            indexes = np.searchsorted(keys, (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]).astype(np.uint8)
+
+            converted = Image.frombytes("P", region.size, indexes.tobytes())
+            converted.putpalette(palette)
+
+            return converted
+
+    frames = []
+
+    for img, box in zip(images, boxes):
+        if not frames:
+            frame = convert(img)
+        else:
+            frame = frames[-1].copy()
+
+            if box:
+                frame.paste(convert(img.crop(box)), box[:2])
+
+        frames.append(frame)
+
+    return frames
+
+
+class FrameWriter:
+    """
+    Saves the frames of a movie to image files (see `Movie.save` and `Simulation.stream`).
+
+    Args:
+        image_path (str): Folder where the images are saved.
+        image_name (str): Name of the image files, "$STEP$" is replaced by the step of the frame.
+    """
+    def __init__(self, image_path, image_name="step_$STEP$.png"):
+        self._image_path = image_path
+        self._image_name = image_name
+
+    def __call__(self, frame):
+        frame.save(os.path.join(self._image_path, self._image_name.replace("$STEP$", f"{frame.steps:02d}")))
+
+
 class Movie:
     def __init__(self, frames=None):
         self._frames = frames if frames else []
         self._centered = False
 
     def center_frames(self):
-        def add_margin(img, x, y, width, height):
-            """
-            from: https://note.nkmk.me/en/python-pillow-add-margin-expand-canvas/
-            """
-            new_img = Image.new(img.mode, (width, height), (255, 255, 255))
-            new_img.paste(img, (x, y))
-            
-            return new_img
-
         if self._centered:
             # no need to recenter
             return
@@ -49,21 +239,10 @@ class Movie:
         
         # resizes and aligns all images so they have the same size and the start node appears
         # allways in the same position.
-        min_x = min(map(lambda frame: -frame.root_x, self._frames))
-        min_y = min(map(lambda frame: -frame.root_y, self._frames))
-        max_x = max(map(lambda frame: frame.img.width - frame.root_x, self._frames))
-        max_y = max(map(lambda frame: frame.img.height - frame.root_y, self._frames))
-
-        width = max_x - min_x
-        height = max_y - min_y
+        viewport = _movie_viewport((frame.root_x, frame.root_y, frame.img.width, frame.img.height) for frame in self._frames)
 
         for frame in self._frames:
-            # shifts the coordinates to align with the start node
-            x_shift = -frame.root_x - min_x
-            y_shift = -frame.root_y - min_y
-
-            # adds a white margin to center the image and make tham all the same size
-            frame.img = add_margin(frame.img, int(x_shift), int(y_shift), int(width), int(height))
+            _center_frame(frame, *viewport)
 
     def add_frame(self, frame):
         self._centered = False
@@ -78,59 +257,434 @@ class Movie:
     def frame_count(self):
         return len(self._frames)
 
+    def save_animation(self, file_name, frame_duration=500, colors=None, loop=0):
+        """
+        Saves all the frames in a single animated image. The format (GIF, APNG or WebP) is given by
+        the extension of `file_name` (".gif", ".png" or ".webp").
+
+        The encoders of Pillow only store the region of each frame that changed from the previous
+        one, which is usually very small.
+
+        Args:
+            file_name (str): Name of the file.
+            frame_duration (int): Time each frame is shown, in milliseconds.
+            colors (int): If given, the frames are converted to a single palette with at most this
+                          number of colours (up to 256), which gives smaller files. GIF files always
+                          use a single palette (256 colours by default).
+            loop (int): Number of times the animation is repeated, 0 for forever.
+        """
+        assert self._frames, "The movie has no frames."
+
+        self.center_frames()
+
+        images = [frame.img for frame in self._frames]
+
+        if colors or file_name.lower().endswith(".gif"):
+            # with the same palette in all frames the unchanged regions remain identical
+            images = _quantize_frames(images, min(colors, _MAX_PALETTE_COLORS) if colors else _MAX_PALETTE_COLORS)
+
+        # the GIF `optimize` option would scan the full frames again to make them transparent
+        images[0].save(file_name, save_all=True, append_images=images[1:], duration=frame_duration, loop=loop, optimize=False, lossless=True)
+
     def save(self, image_path, image_name="step_$STEP$.png"):
         self.center_frames()
 
+        writer = FrameWriter(image_path, image_name)
+
         for frame in self._frames:
             # save the resized image
-            fname = os.path.join(image_path, image_name.replace("$STEP$", f"{frame.steps:02d}"))
+            writer(frame)
 
-            frame.save(fname)
+
+class _TreeHistory(Observer):
+    """
+    Observer that keeps the frame in which each node of the tree appeared and the changes of its
+    colour, from the changes of the tree reported by the algorithm (see `Simulation.vector_movie`).
+    Only the nodes that changed in a frame are checked at the end of the frame.
+
+    Args:
+        root (Alignment): Root of the tree.
+        observer (Observer): Observer of the algorithm, which still receives the statistics of
+                             each step.
+
+    Private Attributes:
+        frame (int): Current frame.
+        first_frames (dict[Alignment, int]): Frame in which each node of the tree appeared.
+        colors (dict[Alignment, list[tuple[int, str]]]): Frames in which the colour of each node of
+                                                         the tree changed, with the new colour.
+        changed (set[Alignment]): Nodes added or coloured in the current frame.
+    """
+    def __init__(self, root: Alignment, observer: Observer):
+        self.observer = observer
+        self.frame = 0
+        self.first_frames, self.colors, self.changed = {}, {}, set()
+
+        self.on_add_child(None, root)
+
+    def on_step(self, stats):
+        if self.observer is not None:
+            self.observer.on_step(stats)
+
+    def on_add_child(self, parent, child):
+        self.first_frames[child] = self.frame
+        self.colors[child] = []
+        self.changed.add(child)
+
+    def on_paint(self, node, color):
+        if node in self.colors:
+            self.changed.add(node)
+
+    def on_reset(self, node):
+        for descendant in node.walk():
+            if descendant is not node:
+                del self.first_frames[descendant], self.colors[descendant]
+                self.changed.discard(descendant)
+
+        self.changed.add(node)
+
+    def end_frame(self):
+        for node in self.changed:
+            colors = self.colors[node]
+
+            if not colors or colors[-1][1] != node.color:
+                colors.append((self.frame, node.color))
+
+        self.changed.clear()
+        self.frame += 1
 
 
 class Simulation:
     """
     This classes simulate algorithms and generate frames and movies of specific states.
+
+    Args:
+        aln (Alignment): Alignment to be explored.
+        algo (Algorithm): Algorithm exploring the alignment.
+        layout (Layout): Layout engine used to draw the frames (see `layout.py`). By default the
+                         classic layout, reusing the layout of the sub trees that did not change
+                         between consecutive frames.
+        canvas_class (type[Canvas]): Class of the canvas used to draw the frames (see `Node.draw`).
+        max_boxes (int): If given, the least interesting sub trees are collapsed before drawing each
+                         frame so that it has at most this number of boxes (see
+                         `detail.level_of_detail`). Not used by `vector_movie`.
+        observer (Observer): Optional observer that receives the time spent in each phase of the
+                             drawing of each frame (see `stats.PhaseStats`). The frames drawn by
+                             the `workers` of a movie only report their layout.
     """
-    def __init__(self, aln: Alignment, algo: Algorithm):
+    def __init__(self, aln: Alignment, algo: Algorithm, layout: Layout=None, canvas_class: type[Canvas]=Canvas, max_boxes: int=None, observer: Observer=None):
         self._aln = aln
         self._algo = algo
+        self._layout = layout if layout else ClassicLayout(incremental=True)
+        self._canvas_class = canvas_class
+        self._max_boxes = max_boxes
+        self._observer = observer
 
         self._count_steps = None
+        self._result = None
 
     def get_steps(self):
         return self._count_steps
 
-    def draw(self):
-        return self._aln.draw(BOX_WIDTH, BOX_HEIGHT, H_MARGIN, V_MARGIN)
+    def get_result(self) -> SearchResult:
+        """
+        Returns the state of the algorithm at the end of the latest frame or movie, including why it
+        stopped (see `Algorithm.result`).
+        """
+        return self._result
+
+    def _tree(self):
+        """
+        Tree to be drawn: the alignment itself or, with `max_boxes`, a reduced copy of it.
+        """
+        return level_of_detail(self._aln, self._max_boxes) if self._max_boxes else self._aln
+
+    def draw(self, viewport: Viewport=None):
+        return self._draw(self._tree(), viewport)
+
+    def _draw(self, tree, viewport=None):
+        if self._observer is None:
+            return tree.draw(BOX_WIDTH, BOX_HEIGHT, H_MARGIN, V_MARGIN, layout=self._layout, canvas_class=self._canvas_class, viewport=viewport)
+
+        # same as `Node.draw`, timing each phase
+        start = perf_counter()
+        _, _, box = self._layout.arrange(tree)
+        self._report_phase("layout", start)
+
+        start = perf_counter()
+        tree._canvas = self._canvas_class(box.min_col, box.min_row, box.max_col, box.max_row, BOX_WIDTH, BOX_HEIGHT, H_MARGIN, V_MARGIN, viewport)
+        tree._draw_all(tree._canvas)
+        self._report_phase("draw", start)
 
-    def frame(self, max_steps):
-        # run at most `max_steps` from the algorihtm
-        end, steps = self._algo.run(self._aln, max_steps=max_steps)
+        start = perf_counter()
+        img = tree._canvas.image()
+        self._report_phase("rasterize", start)
 
+        return img
+
+    def _report_phase(self, phase, start, steps=None):
+        """
+        Sends to the observer the time spent in `phase` since `start`, for the frame of the given
+        number of `steps` (by default the current step of the algorithm).
+        """
+        self._observer.on_phase(PhaseStats(self._algo.steps if steps is None else steps, phase, perf_counter() - start))
+
+    def _snapshot(self, end, steps, viewport=None):
         # generates the image
-        img = self.draw()
+        tree = self._tree()
+        img = self._draw(tree, viewport)
 
         # get the coordinates of the starting node (must be called after draw)
-        x, y = self._aln.get_xy()
+        x, y = tree.get_xy()
 
         return MovieFrame(img, x, y, end, steps)
+
+    def _take_snapshot(self, end, steps, viewport=None) -> FrameSnapshot:
+        """
+        Positions the nodes of the current tree and keeps what is needed to draw it (see
+        `FrameSnapshot`).
+        """
+        start = perf_counter()
+        tree = self._tree()
+        _, _, box = self._layout.arrange(tree)
+
+        if self._observer is not None:
+            self._report_phase("layout", start)
+
+        nodes, stack = [], [(-1, tree)]
+
+        while stack:
+            parent, node = stack.pop()
+            nodes.append((node._col, node._row, node.text, node.color, parent))
+
+            stack.extend((len(nodes) - 1, child) for child in reversed(node._children))
+
+        return FrameSnapshot(box, nodes, viewport, self._canvas_class, end, steps)
+
+    def frame(self, max_steps, budget: Budget=None):
+        if self._algo.is_running(self._aln) and self._algo.steps <= max_steps:
+            # resume the algorithm from the previous frame instead of running it from scratch
+            end, steps = self._algo.advance(max_steps, budget)
+        else:
+            # run at most `max_steps` from the algorihtm
+            end, steps = self._algo.run(self._aln, max_steps=max_steps, budget=budget)
+
+        self._result = self._algo.result
+
+        return self._snapshot(end, steps)
         
-    def movie(self, max_steps, start_step=0, progress=False):
+    def movie(self, max_steps, start_step=0, progress=False, workers=None, budget: Budget=None):
+        """
+        Generates the frames of the algorithm from `start_step` up to `max_steps` (excluded) or
+        until it ends, all of them with the same size and the start node in the same position.
+
+        The algorithm runs a single time: the snapshot of each step (see `FrameSnapshot`) is kept
+        until the size of the movie is known, and then each frame is drawn directly centered in its
+        final viewport. The arguments are the same as in `stream`.
+
+        Returns:
+            Movie: The movie with all the frames.
+        """
         movie = Movie()
-        
-        # generate the individual steps of the algorithm
-        for i in tqdm(range(start_step, max_steps), disable=not progress):
+        snapshots = []
+
+        for i, (end, steps) in zip(range(start_step, max_steps), self._algo.iterate(self._aln, max_steps, start_step, budget)):
+            snapshots.append((i, self._take_snapshot(end, steps)))
 
-            # run the algorithm up to the i-th step and keep the frame
-            frame = self.frame(max_steps=i)
+            if end:
+                break
+
+        self._result = self._algo.result if snapshots else None
+
+        geometries = [_box_geometry(snapshot.box, *snapshot.nodes[0][:2]) for _, snapshot in snapshots]
+        min_x, min_y, width, height = _movie_viewport(geometries)
+
+        for (_, snapshot), (root_x, root_y, _, _) in zip(snapshots, geometries):
+            # shifts the tree to align the start node with the other frames (as `_center_frame`)
+            snapshot.viewport = Viewport(int(-root_x - min_x), int(-root_y - min_y), int(width), int(height))
+
+        if workers:
+            frames = self._draw_in_pool(snapshots, workers)
+        else:
+            report = self._report_phase if self._observer is not None else None
+            frames = ((i, _draw_snapshot(snapshot, report)) for i, snapshot in snapshots)
 
+        for i, frame in tqdm(frames, total=len(snapshots), disable=not progress):
             movie.add_frame(frame)
 
             if frame.end:
                 self._count_steps = i
+
+        movie._centered = True
+
+        return movie
+
+    def _geometry(self) -> tuple[float, float, int, int]:
+        """
+        Computes the position of the start node and the size of the image of the current tree
+        without drawing it (see `_box_geometry`).
+        """
+        start = perf_counter()
+        tree = self._tree()
+        _, _, box = self._layout.arrange(tree)
+
+        if self._observer is not None:
+            self._report_phase("geometry", start)
+
+        return _box_geometry(box, tree._col, tree._row)
+
+    def stream(self, sink, max_steps, start_step=0, progress=False, workers=None, budget: Budget=None):
+        """
+        Generates the same frames as `movie` but passes each one to `sink` as soon as it's rendered
+        instead of keeping all of them in memory.
+
+        The algorithm is run twice: the first run only lays out the tree of each step to compute
+        the size of the frames, and the second one lays it out again and draws each frame directly
+        centered (see `Movie.center_frames`) in its final viewport. Unlike `movie`, nothing is kept
+        between the steps.
+
+        Args:
+            sink (callable): Function called with each `MovieFrame`, e.g. a `FrameWriter` to save
+                             them to files.
+            workers (int): If given, the frames are drawn in parallel by this number of processes.
+                           The algorithm still runs in the current process, which sends a snapshot
+                           of each step to the workers (see `FrameSnapshot`). The frames are passed
+                           to the sink in order.
+            budget (Budget): Optional limits of the run of the algorithm (see `Algorithm.advance`).
+                             Only the first run is limited, the frames are drawn up to the step
+                             where it stopped.
+
+        Returns:
+            int: Number of frames generated.
+        """
+        # layout only pass
+        geometries = []
+
+        for _, (end, _) in zip(range(start_step, max_steps), self._algo.iterate(self._aln, max_steps, start_step, budget)):
+            geometries.append(self._geometry())
+
+            if end:
                 break
 
-        movie.center_frames()
-        
-        return movie
\ No newline at end of file
+        status = self._algo.status
+
+        count_frames = 0
+
+        for i, frame in tqdm(self._draw_frames(max_steps, start_step, geometries, workers), total=len(geometries), disable=not progress):
+            sink(frame)
+            count_frames += 1
+
+            if frame.end:
+                self._count_steps = i
+
+        self._result = replace(self._algo.result, status=status) if geometries else None
+
+        return count_frames
+
+    def _draw_frames(self, max_steps, start_step, geometries, workers):
+        """
+        Generator that runs the algorithm again and draws each frame centered in the viewport of
+        the movie (see `stream`).
+
+        Yields:
+            tuple (int, MovieFrame): Index of the step and the frame, in order.
+        """
+        min_x, min_y, width, height = _movie_viewport(geometries)
+
+        # a single run of the algorithm is paused at each step to take the snapshots. It's not limited
+        # by the budget (e.g. the deadline would not be reached at the same step) but it takes the
+        # same number of steps as the first run: the geometries come before it in `zip`, so no more
+        # steps are taken once they run out
+        states = zip(range(start_step, max_steps), geometries, self._algo.iterate(self._aln, max_steps, start_step))
+
+        def viewport(root_x, root_y):
+            # shifts the tree to align the start node with the other frames (as `_center_frame`)
+            return Viewport(int(-root_x - min_x), int(-root_y - min_y), int(width), int(height))
+
+        if not workers:
+            for i, (root_x, root_y, _, _), (end, steps) in states:
+                yield i, self._snapshot(end, steps, viewport(root_x, root_y))
+
+            return
+
+        # the snapshots are taken as the algorithm advances
+        snapshots = ((i, self._take_snapshot(end, steps, viewport(root_x, root_y))) for i, (root_x, root_y, _, _), (end, steps) in states)
+
+        yield from self._draw_in_pool(snapshots, workers)
+
+    def _draw_in_pool(self, snapshots, workers):
+        """
+        Generator that draws the frames of the `snapshots` (an iterable of tuples (index of the step,
+        `FrameSnapshot`)) in a pool of `workers` processes.
+
+        Yields:
+            tuple (int, MovieFrame): Index of the step and the frame, in order.
+        """
+        with ProcessPoolExecutor(workers) as executor:
+            pending = deque()
+
+            for i, snapshot in snapshots:
+                pending.append((i, executor.submit(_draw_snapshot, snapshot)))
+
+                # only a few frames are in flight, so they don't pile up in memory
+                if len(pending) >= 2 * workers:
+                    i, future = pending.popleft()
+                    yield i, future.result()
+
+            while pending:
+                i, future = pending.popleft()
+                yield i, future.result()
+
+    def vector_movie(self, max_steps, start_step=0, frame_duration=0.5, progress=False, budget: Budget=None) -> AnimatedCanvas:
+        """
+        Generates the same frames as `movie` as a single animated SVG, with no rasterization.
+
+        The final tree is drawn once: each box and link appears in the frame in which its node was
+        created (and remained in the tree until the end) and the colours of the boxes change as the
+        algorithm paints them.
+
+        Args:
+            frame_duration (float): Time each frame is shown, in seconds.
+            budget (Budget): Optional limits of the run of the algorithm (see `Algorithm.advance`).
+
+        Returns:
+            AnimatedCanvas: The canvas with the animation (see `AnimatedCanvas.svg`).
+        """
+        # frame in which each node of the current tree appeared and its changes of colour, kept
+        # from the changes reported by the algorithm instead of traversing the tree in each frame
+        history = _TreeHistory(self._aln, self._algo.observer)
+        self._algo.observer = history
+
+        try:
+            states = self._algo.iterate(self._aln, max_steps, start_step, budget)
+
+            for i, (end, steps) in tqdm(zip(range(start_step, max_steps), states), total=max(0, max_steps - start_step), disable=not progress):
+                history.end_frame()
+
+                if end:
+                    self._count_steps = i
+                    break
+        finally:
+            self._algo.observer = history.observer
+
+        self._result = self._algo.result
+        first_frames, colors, count_frames = history.first_frames, history.colors, history.frame
+
+        _, _, box = self._layout.arrange(self._aln)
+
+        canvas = AnimatedCanvas(box.min_col, box.min_row, box.max_col, box.max_row, BOX_WIDTH, BOX_HEIGHT, H_MARGIN, V_MARGIN, max(1, count_frames) * frame_duration)
+
+        # the links are added just before the boxes of their nodes, as in `Node.draw`
+        stack = [(None, self._aln)]
+
+        while stack:
+            parent, node = stack.pop()
+            start = first_frames.get(node, 0) * frame_duration
+
+            if parent is not None:
+                canvas.add_link(parent._col, parent._row, node._col, node._row, start=start)
+
+            canvas.add_box(node._col, node._row, node.text, None, start=start, colors=[(frame * frame_duration, color) for frame, color in colors.get(node, [])])
+
+            stack.extend((node, child) for child in reversed(node._children))
+
+        return canvas
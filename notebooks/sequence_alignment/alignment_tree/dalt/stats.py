@@ -0,0 +1,118 @@
+import csv
+import json
+from dataclasses import dataclass, asdict, fields
+
+
+@dataclass
+class StepStats:
+    """
+    What happened in a single step of an algorithm.
+
+    Attributes:
+        step (int): Number of the step (1 for the first one).
+        nodes_created (int): Nodes added to the tree by the expansions of the step.
+        nodes_ignored (int): Nodes marked as expanded without being expanded (e.g. dominated by a
+                             node already expanded in the same coordinates).
+        frontier_size (int): Nodes that can still be expanded after the step.
+        best_frontier_score (int): Score of the best node that can be expanded, `None` if there is
+                                   none.
+        selection_time (float): Seconds spent choosing the nodes to expand (the step minus the
+                                expansions).
+        expansion_time (float): Seconds spent expanding the nodes.
+    """
+    step: int
+    nodes_created: int
+    nodes_ignored: int
+    frontier_size: int
+    best_frontier_score: int
+    selection_time: float
+    expansion_time: float
+
+
+@dataclass
+class PhaseStats:
+    """
+    Time spent by a `Simulation` in one phase of the drawing of a frame.
+
+    Attributes:
+        step (int): Number of steps of the algorithm in the frame.
+        phase (str): "geometry" (layout only, to size the frames of `Simulation.stream`), "layout",
+                     "draw" (adding the boxes and links to the canvas) or "rasterize" (converting
+                     the canvas into an image).
+        seconds (float): Time spent in the phase.
+    """
+    step: int
+    phase: str
+    seconds: float
+
+
+class Observer:
+    """
+    Base class of the observers of the algorithms and the simulations. The methods are called after
+    each step of an algorithm, each change of the tree made by an algorithm and each phase of a
+    simulation, and do nothing by default.
+
+    Usage:
+        recorder = StatsRecorder()
+        algo = AlgorithmDynamicProgramming(observer=recorder)
+    """
+    def on_step(self, stats: StepStats):
+        pass
+
+    def on_phase(self, stats: PhaseStats):
+        pass
+
+    def on_add_child(self, parent, child):
+        """
+        Called when `child` is added to the tree as a child of `parent`.
+        """
+        pass
+
+    def on_paint(self, node, color: str):
+        """
+        Called when `node` is coloured with `color` (`None` for the default colour).
+        """
+        pass
+
+    def on_reset(self, node):
+        """
+        Called before all the descendants of `node` are removed from the tree and its colour is
+        cleared (see `Node.reset`).
+        """
+        pass
+
+
+def _write_csv(file_name: str, records: list, record_class: type):
+    with open(file_name, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([field.name for field in fields(record_class)])
+        writer.writerows([getattr(record, field.name) for field in fields(record_class)] for record in records)
+
+
+class StatsRecorder(Observer):
+    """
+    Observer that keeps all the statistics reported, to be exported to CSV or JSON files.
+
+    Attributes:
+        steps (list[StepStats]): Statistics of each step of the algorithms.
+        phases (list[PhaseStats]): Statistics of each phase of the simulations.
+    """
+    def __init__(self):
+        self.steps = []
+        self.phases = []
+
+    def on_step(self, stats: StepStats):
+        self.steps.append(stats)
+
+    def on_phase(self, stats: PhaseStats):
+        self.phases.append(stats)
+
+    def steps_to_csv(self, file_name: str):
+        _write_csv(file_name, self.steps, StepStats)
+
+    def phases_to_csv(self, file_name: str):
+        _write_csv(file_name, self.phases, PhaseStats)
+
+    def to_json(self, file_name: str):
+        with open(file_name, "w") as f:
+            json.dump({"steps": [asdict(stats) for stats in self.steps], "phases": [asdict(stats) for stats in self.phases]}, f, indent=1)
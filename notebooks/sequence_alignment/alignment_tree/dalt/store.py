@@ -0,0 +1,583 @@
+import heapq
+import sys
+from array import array
+
+from .alignment import Alignment, Operation, _FrontierEntry
+
+# code stored for the nodes that don't add any operation to their parent (e.g. the root or the
+# child of a compacted node)
+_NO_OP = 0
+
+# value stored in the layout arrays for nodes that were not positioned yet
+_NO_POSITION = -2**31
+
+# count stored for the nodes whose aggregates were not computed yet (see `Node._get_aggregate`)
+_NO_AGGREGATE = -1
+
+# number of nodes whose sparse attributes are measured to estimate the memory of the tree
+_SIZE_SAMPLES = 16
+
+
+class AlignmentStore:
+    """
+    Compact storage for very large alignment trees.
+
+    Instead of one `Alignment` object per node, the tree is kept in a "struct of arrays": each node
+    is an index into a set of typed arrays. The nodes are accessed through `AlignmentView` objects
+    that expose the same API as `Alignment` and are created on demand, so the algorithms, the
+    traversal methods and the drawing code work unchanged on the compact tree.
+
+    Usage:
+        aln = AlignmentStore("ABC", "ABXABC", 3, -1, -2).root
+
+    Args:
+        seq1, seq2 (str): Sequences to be aligned.
+        vmatch, vmismatch, vgap (int): Values of the scoring scheme.
+
+    Private Attributes:
+        _parent, _first_child, _next_sibling (array): Indexes linking the nodes of the tree (-1
+                                                       if none).
+        _op (array): Operation applied to the parent to get the node (`_NO_OP` if none).
+        _score, _i, _j, _depth (array): Score, next positions to be consumed and depth of the node.
+        _expanded, _hidden (array): Flags of the node (see `Alignment`).
+        _col, _row (array): Layout coordinates of the node (`_NO_POSITION` if not positioned).
+        _count (array): Number of nodes in the sub tree of the node (`_NO_AGGREGATE` if not
+                        computed, see `Alignment._compute_aggregate`).
+        _best_leaf, _best_solution, _to_expand (array): Indexes of the other aggregates of the sub
+                                                        tree of the node (-1 if none).
+        _colors, _texts, _boxes, _xys, _layouts (dict): Sparse attributes, only set for a few nodes.
+        _free (list[int]): Indexes of the nodes removed from the tree (e.g. below a compacted
+                           node), reused by the new nodes.
+        _frontier (list[_FrontierEntry]): Frontier priority queue of the tree (see `Alignment`).
+        _order (_TreeOrder): Depth-first order of the nodes of the tree (see `Alignment`).
+        _indexes (_TreeIndex): Indexes of the nodes of the tree (see `Alignment`).
+        _band (int): Band of the tree (see `Alignment`).
+    """
+    def __init__(self, seq1: str, seq2: str, vmatch: int, vmismatch: int, vgap: int):
+        self._seq1 = seq1
+        self._seq2 = seq2
+        self._vmatch = vmatch
+        self._vmismatch = vmismatch
+        self._vgap = vgap
+
+        self.clear()
+
+        self._root = AlignmentView(self, 0)
+
+    def clear(self):
+        """
+        Removes all the nodes from the store except the root.
+        """
+        self._parent = array("i")
+        self._first_child = array("i")
+        self._next_sibling = array("i")
+        self._op = array("b")
+        self._score = array("i")
+        self._i = array("i")
+        self._j = array("i")
+        self._depth = array("i")
+        self._expanded = array("b")
+        self._hidden = array("b")
+        self._col = array("i")
+        self._row = array("i")
+        self._count = array("i")
+        self._best_leaf = array("i")
+        self._best_solution = array("i")
+        self._to_expand = array("i")
+
+        self._colors = {}
+        self._texts = {}
+        self._boxes = {}
+        self._xys = {}
+        self._layouts = {}
+
+        self._free = []
+
+        self._frontier = None
+        self._order = None
+        self._indexes = None
+        self._algorithm = None
+        self._band = None
+
+        self._new_node(_NO_OP, 0, 0, 0)
+
+    def __len__(self):
+        # number of nodes in the tree
+        return len(self._parent) - len(self._free)
+
+    def _get_root(self):
+        return self._root
+
+    root = property(fget=_get_root, doc="View of the root node of the tree.")
+
+    def _new_node(self, op: int, score: int, i: int, j: int) -> int:
+        """
+        Adds a new (unlinked) node to the store, reusing the index of a removed node if there is
+        any.
+
+        Returns:
+            int: Index of the new node.
+        """
+        if not self._free:
+            self._parent.append(-1)
+            self._first_child.append(-1)
+            self._next_sibling.append(-1)
+            self._op.append(op)
+            self._score.append(score)
+            self._i.append(i)
+            self._j.append(j)
+            self._depth.append(0)
+            self._expanded.append(False)
+            self._hidden.append(False)
+            self._col.append(_NO_POSITION)
+            self._row.append(_NO_POSITION)
+            self._count.append(_NO_AGGREGATE)
+            self._best_leaf.append(-1)
+            self._best_solution.append(-1)
+            self._to_expand.append(-1)
+
+            return len(self._parent) - 1
+
+        n = self._free.pop()
+
+        self._parent[n] = self._first_child[n] = self._next_sibling[n] = -1
+        self._op[n], self._score[n], self._i[n], self._j[n], self._depth[n] = op, score, i, j, 0
+        self._expanded[n] = self._hidden[n] = False
+        self._col[n] = self._row[n] = _NO_POSITION
+        self._count[n] = _NO_AGGREGATE
+        self._best_leaf[n] = self._best_solution[n] = self._to_expand[n] = -1
+
+        return n
+
+    def _remove_descendants(self, n: int):
+        """
+        Removes all the descendants of the node `n` from the tree: their indexes are reused by the
+        new nodes and their sparse attributes are discarded.
+        """
+        stack = list(self._children(n))
+
+        while stack:
+            node = stack.pop()
+            stack.extend(self._children(node))
+
+            self._first_child[node] = -1
+
+            for values in (self._colors, self._texts, self._boxes, self._xys, self._layouts):
+                values.pop(node, None)
+
+            self._free.append(node)
+
+        self._first_child[n] = -1
+
+    def _children(self, n: int):
+        child = self._first_child[n]
+
+        while child != -1:
+            yield child
+            child = self._next_sibling[child]
+
+    def _index(self, n: int) -> int:
+        """
+        Position of the node `n` in the list of children of its parent.
+        """
+        parent = self._parent[n]
+
+        if parent == -1:
+            return 0
+
+        for index, child in enumerate(self._children(parent)):
+            if child == n:
+                return index
+
+    def _update_aggregates(self, n: int):
+        """
+        Computes the aggregates of the nodes of the sub tree of `n` that were not computed yet (see
+        `Node._get_aggregate`). Same as `Alignment._compute_aggregate` but directly on the arrays,
+        without creating views of the nodes.
+        """
+        count, best_leaf, best_solution, to_expand = self._count, self._best_leaf, self._best_solution, self._to_expand
+        score = self._score
+        len1, len2 = len(self._seq1), len(self._seq2)
+
+        stack = [n] if count[n] == _NO_AGGREGATE else []
+
+        while stack:
+            node = stack[-1]
+            children = list(self._children(node))
+
+            # the children are computed before their parent
+            pending = [child for child in children if count[child] == _NO_AGGREGATE]
+
+            if pending:
+                stack.extend(pending)
+                continue
+
+            stack.pop()
+
+            # no solution is searched below a solution
+            is_solution = self._i[node] >= len1 and self._j[node] >= len2
+
+            total, leaf = 0, -1 if children else node
+            solution = node if is_solution else -1
+            expand = node if not is_solution and not self._expanded[node] else -1
+
+            for child in children:
+                total += 1 + count[child]
+
+                if expand == -1:
+                    expand = to_expand[child]
+
+                child_leaf, child_solution = best_leaf[child], best_solution[child]
+
+                if leaf == -1 or score[child_leaf] > score[leaf]:
+                    leaf = child_leaf
+
+                if not is_solution and child_solution != -1 and (solution == -1 or score[child_solution] > score[solution]):
+                    solution = child_solution
+
+            count[node], best_leaf[node], best_solution[node], to_expand[node] = total, leaf, solution, expand
+
+    def _invalidate_aggregates(self, n: int):
+        """
+        Discards the aggregates of the node `n` and of all its ancestors (see
+        `Node._invalidate_aggregate`).
+        """
+        # the ancestors of a node without aggregates have no aggregates either
+        while n != -1 and self._count[n] != _NO_AGGREGATE:
+            self._count[n] = _NO_AGGREGATE
+            n = self._parent[n]
+
+    def _link(self, parent: int, child: int):
+        """
+        Adds the node `child` to the end of the list of children of `parent`.
+        """
+        self._parent[child] = parent
+        self._depth[child] = self._depth[parent] + 1
+        self._next_sibling[child] = -1
+
+        last = -1
+
+        for last in self._children(parent):
+            pass
+
+        if last == -1:
+            self._first_child[parent] = child
+        else:
+            self._next_sibling[last] = child
+
+
+def _array_property(name: str, cast=None, doc: str=None):
+    """
+    Property of `AlignmentView` backed by the array `name` of the store.
+    """
+    def fget(self):
+        value = getattr(self._store, name)[self._n]
+
+        return cast(value) if cast else value
+
+    def fset(self, value):
+        getattr(self._store, name)[self._n] = value
+
+    return property(fget=fget, fset=fset, doc=doc)
+
+
+def _position_property(name: str):
+    """
+    Property of `AlignmentView` backed by the layout array `name` of the store.
+    """
+    def fget(self):
+        value = getattr(self._store, name)[self._n]
+
+        return None if value == _NO_POSITION else value
+
+    def fset(self, value):
+        getattr(self._store, name)[self._n] = _NO_POSITION if value is None else value
+
+    return property(fget=fget, fset=fset)
+
+
+def _sizeof(value) -> int:
+    """
+    Approximate memory used by a value of a sparse attribute, including the tuples and objects it
+    contains (the small numbers are shared by Python, so they are not counted).
+    """
+    if value is None or type(value) is int:
+        return 0
+
+    size = sys.getsizeof(value)
+
+    if type(value) is tuple:
+        for item in value:
+            if item is not None and type(item) is not int:
+                size += _sizeof(item)
+    elif hasattr(value, "__dict__"):
+        size += sys.getsizeof(value.__dict__)
+
+    return size
+
+
+def _dict_property(name: str):
+    """
+    Property of `AlignmentView` backed by the sparse dictionary `name` of the store.
+    """
+    def fget(self):
+        return getattr(self._store, name).get(self._n)
+
+    def fset(self, value):
+        if value is None:
+            getattr(self._store, name).pop(self._n, None)
+        else:
+            getattr(self._store, name)[self._n] = value
+
+    return property(fget=fget, fset=fset)
+
+
+def _store_property(name: str):
+    """
+    Property of `AlignmentView` shared by all the nodes of the store.
+    """
+    def fget(self):
+        return getattr(self._store, name)
+
+    def fset(self, value):
+        setattr(self._store, name, value)
+
+    return property(fget=fget, fset=fset)
+
+
+class AlignmentView(Alignment):
+    """
+    Lightweight view of a node of an `AlignmentStore`.
+
+    The view exposes the same API as `Alignment` but keeps no state of its own: all the attributes
+    are read from and written to the arrays of the store. Views are created on demand and two views
+    of the same node are equal.
+
+    The indexes of the nodes removed from the tree (e.g. by `compact`) are reused by the new nodes,
+    so the views of the removed nodes must not be used afterwards.
+
+    Args:
+        store (AlignmentStore): Store holding the tree.
+        n (int): Index of the node in the store.
+    """
+    __slots__ = ("_store", "_n")
+
+    def __init__(self, store: AlignmentStore, n: int):
+        self._store = store
+        self._n = n
+
+    def __eq__(self, other):
+        return isinstance(other, AlignmentView) and self._store is other._store and self._n == other._n
+
+    def __hash__(self):
+        return hash(self._n)
+
+    def __repr__(self):
+        return f"AlignmentView({self._n})"
+
+    _seq1 = _store_property("_seq1")
+    _seq2 = _store_property("_seq2")
+    _vmatch = _store_property("_vmatch")
+    _vmismatch = _store_property("_vmismatch")
+    _vgap = _store_property("_vgap")
+    _frontier = _store_property("_frontier")
+    _order = _store_property("_order")
+    _indexes = _store_property("_indexes")
+    _band = _store_property("_band")
+
+    _score = _array_property("_score")
+    _i = _array_property("_i")
+    _j = _array_property("_j")
+    _depth = _array_property("_depth")
+    _expanded = _array_property("_expanded", bool)
+    _hidden = _array_property("_hidden", bool)
+
+    _col = _position_property("_col")
+    _row = _position_property("_row")
+
+    _color = _dict_property("_colors")
+    _text = _dict_property("_texts")
+    _box = _dict_property("_boxes")
+    _xy = _dict_property("_xys")
+    _layout = _dict_property("_layouts")
+
+    def _get_aggregate_view(self):
+        store, n = self._store, self._n
+        count = store._count[n]
+
+        if count == _NO_AGGREGATE:
+            return None
+
+        best_solution, to_expand = store._best_solution[n], store._to_expand[n]
+
+        return (count,
+                AlignmentView(store, store._best_leaf[n]),
+                None if best_solution == -1 else AlignmentView(store, best_solution),
+                None if to_expand == -1 else AlignmentView(store, to_expand))
+
+    def _set_aggregate_view(self, aggregate):
+        store, n = self._store, self._n
+
+        if aggregate is None:
+            store._count[n] = _NO_AGGREGATE
+            return
+
+        count, best_leaf, best_solution, to_expand = aggregate
+
+        store._count[n] = count
+        store._best_leaf[n] = best_leaf._n
+        store._best_solution[n] = -1 if best_solution is None else best_solution._n
+        store._to_expand[n] = -1 if to_expand is None else to_expand._n
+
+    # the nodes of the aggregates are kept by index, as the links of the tree
+    _aggregate = property(fget=_get_aggregate_view, fset=_set_aggregate_view)
+
+    def _get_aggregate(self) -> tuple:
+        self._store._update_aggregates(self._n)
+
+        return self._aggregate
+
+    def _invalidate_aggregate(self):
+        self._store._invalidate_aggregates(self._n)
+
+    def _get_children(self):
+        return [AlignmentView(self._store, child) for child in self._store._children(self._n)]
+
+    def _set_children(self, children):
+        assert not children, "The children of a view can only be cleared."
+
+        self._store._remove_descendants(self._n)
+
+    _children = property(fget=_get_children, fset=_set_children)
+
+    def _get_parent(self):
+        parent = self._store._parent[self._n]
+
+        return None if parent == -1 else AlignmentView(self._store, parent)
+
+    _parent = property(fget=_get_parent)
+
+    def _get_root_view(self):
+        return self._store._root
+
+    _root = property(fget=_get_root_view)
+
+    def _get_algorithm(self):
+        return self._store._algorithm if self._n == 0 else None
+
+    def _set_algorithm(self, algorithm):
+        # only the state of the algorithm running on the full tree is kept
+        if self._n == 0:
+            self._store._algorithm = algorithm
+
+    _algorithm = property(fget=_get_algorithm, fset=_set_algorithm)
+
+    def _get_index(self):
+        return self._store._index(self._n)
+
+    _index = property(fget=_get_index)
+
+    def _get_view_id(self):
+        path, n = [], self._n
+
+        while self._store._parent[n] != -1:
+            path.append(f".{self._store._index(n) + 1}")
+            n = self._store._parent[n]
+
+        return "*" + "".join(reversed(path))
+
+    _id = property(fget=_get_view_id)
+
+    def _get_ops(self):
+        ops, n = [], self._n
+
+        while n != -1:
+            if self._store._op[n] != _NO_OP:
+                ops.append(Operation(self._store._op[n]))
+
+            n = self._store._parent[n]
+
+        ops.reverse()
+
+        return ops
+
+    ops = property(fget=_get_ops, doc="List of operations performed so far.")
+
+    def reset(self):
+        if self._n == 0:
+            # resetting the root clears the full store
+            self._store.clear()
+        else:
+            super().reset()
+
+    def add_child(self, child: "AlignmentView"):
+        store = self._store
+        store._link(self._n, child._n)
+
+        store._hidden[child._n] = store._hidden[self._n] or not store._expanded[self._n]
+
+        self._invalidate_layout()
+        self._invalidate_aggregate()
+
+        # the order, the indexes and the frontier only keep the nodes of the tree
+        if store._order is not None and self in store._order:
+            store._order.add(child, self)
+
+            if store._indexes is not None:
+                store._indexes.add(child)
+
+            # the children of an expanded node are candidates to be expanded next
+            if store._frontier is not None and not store._hidden[child._n] and not child._expanded and not child.is_solution():
+                heapq.heappush(store._frontier, _FrontierEntry(child, store._order))
+
+        return self
+
+    def _get_node_bytes(self) -> int:
+        """
+        Approximate memory used by each node of the tree, in bytes: an entry of each typed array of
+        the store and its share of the sparse attributes set so far (e.g. the cached layout of the
+        nodes once the tree is drawn).
+
+        The size of the values of each sparse attribute is the average of a few nodes spread over
+        the store, so the estimate doesn't depend on the size of the tree.
+        """
+        store = self._store
+        count, entries = len(store), len(store._parent)
+
+        # one entry of each typed array of the store, including the entries of the removed nodes
+        # that were not reused yet
+        size = sum(value.itemsize for value in vars(store).values() if isinstance(value, array)) * entries // count
+
+        for values in (store._colors, store._texts, store._boxes, store._xys, store._layouts):
+            sparse = sys.getsizeof(values)
+
+            if values:
+                sample = [values[n] for n in range(0, entries, max(1, entries // _SIZE_SAMPLES)) if n in values]
+                sample = sample or [next(iter(values.values()))]
+                sparse += len(values) * sum(map(_sizeof, sample)) // len(sample)
+
+            size += sparse // count
+
+        return size
+
+    def child_alignment_factory(self, op):
+        if op == Operation.GAP_DOWN and self._can_consume_seq1() or \
+           op == Operation.GAP_UP and self._can_consume_seq2() or \
+           op == Operation.MATCH and self._can_consume():
+            _, _, _, inc_score, inc_i, inc_j = self._apply_op(op, self._i, self._j)
+
+            n = self._store._new_node(op.value, self._score + inc_score, self._i + inc_i, self._j + inc_j)
+
+            return AlignmentView(self._store, n)
+        else:
+            return None
+
+    def compact(self, color=None):
+        count_children = self.count_children()
+
+        self.reset()
+        compact_child = AlignmentView(self._store, self._store._new_node(_NO_OP, self._score, self._i, self._j))
+        compact_child.text = f"{count_children} children"
+
+        self.add_child(compact_child)
+        self.color = color
@@ -1,19 +1,200 @@
 # to get coverage run:
 # $ coverage run test_dalt.py; coverage html
 
+import os
 import sys
+import tempfile
+import time
 
 # adding parent folder to the system path
 sys.path.insert(0, '../..')
  
 from dalt.alignment import Alignment
-from dalt.simulation import Simulation
+from dalt.store import AlignmentStore
+from dalt.simulation import Movie, MovieFrame, Simulation
+from dalt.algorithm import Budget
 from dalt.algorithm_bf import AlgorithmBruteForce
+from dalt.algorithm_dp import AlgorithmDynamicProgramming
+from dalt.algorithm_nw import AlgorithmNeedlemanWunsch
+from dalt.algorithm_hirschberg import AlgorithmHirschberg
+from dalt.algorithm_astar import AlgorithmAStar
+from dalt.canvas import RasterCanvas, Viewport
+from dalt.layout import ClassicLayout, TidyLayout
+from dalt.detail import level_of_detail
+from dalt.dag import AlignmentDAG
+from dalt.stats import StatsRecorder
+from PIL import Image
+
+from dalt.matrix import global_alignment, linear_global_alignment, banded_global_alignment
 
 MATCH = 2
 MISMATCH = -1
 GAP = -2
 
+#
+# Incremental layout
+#
+# reusing the layout of the unchanged sub trees must give the same positions as a full layout
+aln = Alignment("ABCAB", "ABXAB", 3, -1, -2)
+aln_full = Alignment("ABCAB", "ABXAB", 3, -1, -2)
+
+incremental = ClassicLayout(incremental=True)
+
+for _ in zip(AlgorithmBruteForce().iterate(aln, 300), AlgorithmBruteForce().iterate(aln_full, 300)):
+    incremental.arrange(aln)
+    aln_full._arrange_all()
+
+    assert [(node._col, node._row, node._box) for node in aln.walk()] == [(node._col, node._row, node._box) for node in aln_full.walk()]
+
+#
+# Tidy layout
+#
+# the nodes of each column keep their order without overlapping and the parents stay between their
+# first and last children
+_, _, box = TidyLayout().arrange(aln)
+rows = {}
+
+for node in aln.walk():
+    rows.setdefault(node._col, []).append(node._row)
+
+    if node._children:
+        assert node._children[0]._row <= node._row <= node._children[-1]._row
+
+assert all(a < b for col in rows.values() for a, b in zip(col, col[1:]))
+assert box.min_row == 0 and box.max_row == max(max(col) for col in rows.values())
+
+#
+# Raster canvas
+#
+# the frames drawn directly in the image have the same geometry as the SVG ones
+s = Simulation(Alignment("ABCAB", "ABXAB", 3, -1, -2), AlgorithmBruteForce(), canvas_class=RasterCanvas)
+frame = s.frame(20)
+
+_, _, box = s._aln._arrange_all()
+assert frame.img.size == ((box.max_col - box.min_col + 1) * (80 + 2 * 5), (box.max_row - box.min_row + 1) * (35 + 2 * 5))
+assert (frame.root_x, frame.root_y) == s._aln.get_xy()
+
+#
+# Viewports
+#
+# a tree drawn in a viewport is the same as the tree drawn on its own and shifted
+frame = s.frame(30)
+width, height = frame.img.size
+shifted = s._snapshot(frame.end, frame.steps, Viewport(90, 45, width + 180, height + 90))
+
+assert shifted.img.size == (width + 180, height + 90)
+assert shifted.img.crop((90, 45, 90 + width, 45 + height)).tobytes() == frame.img.tobytes()
+assert (shifted.root_x, shifted.root_y) == (frame.root_x + 90, frame.root_y + 45)
+
+#
+# Streaming movies
+#
+# the frames passed to the sink are the same centered frames as in the full movie
+s = Simulation(Alignment("ABCAB", "ABXAB", 3, -1, -2), AlgorithmDynamicProgramming(), canvas_class=RasterCanvas)
+movie = s.movie(30)
+
+# all the frames have the same size and the start node in the same position
+assert len({(frame.img.size, frame.root_x, frame.root_y) for frame in movie._frames}) == 1
+
+frames = []
+assert s.stream(frames.append, 30) == movie.frame_count()
+
+for i, frame in enumerate(frames):
+    assert frame.steps == movie.get_frames(i).steps
+    assert frame.img.tobytes() == movie.get_frames(i).img.tobytes()
+
+# the movie runs the algorithm a single time, the stream a second time to draw the frames
+recorder = StatsRecorder()
+s = Simulation(Alignment("ABCAB", "ABXAB", 3, -1, -2), AlgorithmDynamicProgramming(observer=recorder), canvas_class=RasterCanvas)
+
+assert s.movie(30).frame_count() == len(recorder.steps) + 1
+
+recorder.steps.clear()
+assert s.stream(frames.append, 30) == len(recorder.steps) / 2 + 1
+
+# the frames drawn by a pool of processes are the same and in the same order (the workers may
+# import this script again, so the pool is only started from the main process)
+if __name__ == "__main__":
+    parallel_movie = s.movie(30, workers=2)
+
+    assert [frame.img.tobytes() for frame in parallel_movie._frames] == [frame.img.tobytes() for frame in movie._frames]
+
+#
+# Animated images
+#
+# a single file with all the frames, the GIF palette is exact for the few colours of the frames
+with tempfile.TemporaryDirectory() as folder:
+    for name in ("movie.gif", "movie.png"):
+        movie.save_animation(os.path.join(folder, name))
+
+        with Image.open(os.path.join(folder, name)) as img:
+            assert img.n_frames == movie.frame_count()
+
+            img.seek(movie.frame_count() - 1)
+            assert img.convert("RGB").tobytes() == movie.get_frames(movie.frame_count() - 1).img.tobytes()
+
+# a palette has at most 256 colours, whatever the number of colours requested
+img = Image.new("RGB", (300, 1))
+img.putdata([(i % 256, i // 256 * 128, 0) for i in range(300)])
+
+with tempfile.TemporaryDirectory() as folder:
+    Movie([MovieFrame(img, 0, 0, True, 0)]).save_animation(os.path.join(folder, "colors.png"), colors=1000)
+
+    with Image.open(os.path.join(folder, "colors.png")) as saved:
+        assert max(abs(a - b) for a, b in zip(saved.convert("RGB").tobytes(), img.tobytes())) < 16
+
+#
+# Animated SVG movie
+#
+# each node of the final tree is drawn once, whatever the number of frames
+s = Simulation(Alignment("ABCAB", "ABXAB", 3, -1, -2), AlgorithmBruteForce())
+svg = s.vector_movie(30).svg()
+
+assert svg.count("<text") == s._aln.count_children() + 1
+assert svg.count("<path") == s._aln.count_children()
+
+# the nodes and colours are reported by the algorithm, whose observer still gets the steps
+recorder = StatsRecorder()
+s = Simulation(Alignment("ABCAB", "ABXAB", 3, -1, -2), AlgorithmDynamicProgramming(band=1, observer=recorder))
+svg = s.vector_movie(30).svg()
+
+assert svg.count("<text") == s._aln.count_children() + 1 and s._algo.observer is recorder
+assert len(recorder.steps) == s._algo.steps > 0
+
+#
+# Level of detail
+#
+# the copy to draw fits in the budget and keeps the path to the latest expanded node, without
+# changing the tree
+aln = Alignment("ABCABC", "ABXAB", 3, -1, -2)
+AlgorithmBruteForce().run(aln, max_steps=100)
+nodes = [(node.id, node.text, node.color) for node in aln.walk()]
+
+tree = level_of_detail(aln, 40)
+assert tree.count_children() + 1 <= 40 < len(nodes)
+assert "#00ff00" in [node.color for node in tree.walk()]
+assert [(node.id, node.text, node.color) for node in aln.walk()] == nodes
+
+# with a large budget nothing is collapsed
+assert [(node.text, node.color) for node in level_of_detail(aln, 10 ** 6).walk()] == [(text, color) for _, text, color in nodes]
+
+# with the same interest, the sub trees closest to the best node to expand are opened first
+aln = Alignment("AAAA", "AAAA", 3, -1, -2)
+aln.expand()
+far, match, _ = aln._children
+match.expand()
+match._children[1].expand()
+near = match._children[1]._children[0]
+far.expand()
+near.expand()
+
+tree = level_of_detail(aln, 14)
+assert [node.text for node in tree._children[0]._children] == ["3 children"]
+assert len(tree._children[1]._children[1]._children[0]._children) == 3
+
+s = Simulation(Alignment("ABCABC", "ABXAB", 3, -1, -2), AlgorithmBruteForce(), canvas_class=RasterCanvas, max_boxes=40)
+assert s.frame(100).img.tobytes() == s._draw(level_of_detail(s._aln, 40)).tobytes()
+
 #
 # First test
 #
@@ -60,6 +241,271 @@ assert best_non_expanded.id == "*.2.1"
 # mark it as "expanded" without actually expanding it
 best_non_expanded.expand(ignore=True)
 
+#
+# Resumable algorithms
+#
+# a single pass through `iterate` must leave the tree in the same state as `run` for each step
+def tree_state(node):
+    return [(node.id, node.text, node.color)] + sum([tree_state(child) for child in node._children], [])
+
+for algo in (AlgorithmBruteForce(), AlgorithmDynamicProgramming()):
+    aln = Alignment("ABC", "AXC", 3, -1, -2)
+    states = [(end, steps, tree_state(aln)) for end, steps in algo.iterate(aln, 100)]
+
+    for i, state in enumerate(states):
+        end, steps = algo.run(aln, max_steps=i)
+        assert state == (end, steps, tree_state(aln))
+
+    assert end
+
+#
+# Frontier priority queue
+#
+# the root keeps a priority queue that must pick the same node as the recursive search
+aln = Alignment("ABC", "AXC", 3, -1, -2)
+algo = AlgorithmDynamicProgramming()
+algo.start(aln)
+
+while not algo.step():
+    assert aln.get_best_node_to_expand() is aln._get_best_node_to_expand_all()
+
+aln._children[1].compact()
+assert aln.get_best_node_to_expand() is aln._get_best_node_to_expand_all()
+
+#
+# Statistics
+#
+# the frontier reported after each step is the one of the tree
+recorder = StatsRecorder()
+aln = Alignment("ABCAB", "ABXAB", 3, -1, -2)
+algo = AlgorithmDynamicProgramming(observer=recorder)
+algo.start(aln)
+
+while not algo.step():
+    frontier = [node for node in aln.walk() if node._can_expand()]
+
+    assert recorder.steps[-1].frontier_size == len(frontier)
+    assert recorder.steps[-1].best_frontier_score == max((node.score for node in frontier), default=None)
+
+assert sum(stats.nodes_created for stats in recorder.steps) == aln.count_children()
+assert sum(stats.nodes_ignored for stats in recorder.steps) == sum(node.color == "#000000" for node in aln.walk())
+
+# the algorithms that only add the optimal path report its nodes too
+for algo_class in (AlgorithmNeedlemanWunsch, AlgorithmHirschberg):
+    recorder = StatsRecorder()
+    aln = Alignment("ABCAB", "ABXAB", 3, -1, -2)
+    algo_class(observer=recorder).run(aln, max_steps=100)
+
+    assert [stats.nodes_created for stats in recorder.steps] == [1] * aln.count_children()
+    assert all(stats.frontier_size == 1 for stats in recorder.steps[:-1]) and recorder.steps[-1].frontier_size == 0
+
+# the simulation reports the phases of the drawing of each frame
+Simulation(Alignment("ABCAB", "ABXAB", 3, -1, -2), AlgorithmBruteForce(), canvas_class=RasterCanvas, observer=recorder).frame(10)
+assert [stats.phase for stats in recorder.phases] == ["layout", "draw", "rasterize"]
+
+with tempfile.TemporaryDirectory() as folder:
+    recorder.steps_to_csv(os.path.join(folder, "steps.csv"))
+
+    with open(os.path.join(folder, "steps.csv")) as f:
+        assert len(f.readlines()) == len(recorder.steps) + 1
+
+#
+# Budgets
+#
+# the run stops before the tree grows over the budget, keeping the best partial state
+aln = Alignment("ABCAB", "ABXAB", 3, -1, -2)
+algo = AlgorithmBruteForce()
+found, steps = algo.run(aln, max_steps=1000, budget=Budget(max_nodes=50))
+
+assert not found and aln.count_children() + 1 <= 50
+assert algo.status == "max_nodes" and algo.result.steps == steps
+assert algo.result.best_leaf == aln.get_best_leaf() and algo.result.best_node_to_expand is not None
+
+aln = Alignment("ABCAB", "ABXAB", 3, -1, -2)
+algo.run(aln, max_steps=1000, budget=Budget(max_bytes=50 * aln._get_node_bytes()))
+assert algo.status == "max_bytes" and aln.count_children() + 1 <= 50
+
+# the memory of a store includes the layouts cached when the tree is drawn
+aln = AlignmentStore("ABCAB", "ABXAB", 3, -1, -2).root
+algo.run(aln, max_steps=100)
+node_bytes = aln._get_node_bytes()
+ClassicLayout(incremental=True).arrange(aln)
+assert aln._get_node_bytes() > 2 * node_bytes
+
+aln = Alignment("ABCAB", "ABXAB", 3, -1, -2)
+assert algo.run(aln, max_steps=1000, budget=Budget(max_seconds=0)) == (False, 0)
+assert algo.status == "deadline"
+
+# the deadline counts from the start of the run, also when it is resumed
+aln = Alignment("ABCAB", "ABXAB", 3, -1, -2)
+budget = Budget(max_seconds=0.2)
+algo.run(aln, max_steps=3, budget=budget)
+time.sleep(0.2)
+assert algo.advance(1000, budget) == (False, 3)
+assert algo.status == "deadline"
+
+aln = Alignment("ABCAB", "ABXAB", 3, -1, -2)
+assert AlgorithmDynamicProgramming().run(aln, max_steps=1000, budget=Budget(max_nodes=1000))[0]
+
+# each state is yielded once, the last one being where the budget stopped the run
+states = list(AlgorithmBruteForce().iterate(Alignment("ABCAB", "ABXAB", 3, -1, -2), 1000, budget=Budget(max_nodes=50)))
+assert [steps for _, steps in states] == list(range(len(states)))
+
+# the movies stop at the same step and with the same tree as a single frame with the same budget
+budget = Budget(max_nodes=30)
+s = Simulation(Alignment("ABCAB", "ABXAB", 3, -1, -2), AlgorithmBruteForce(), canvas_class=RasterCanvas)
+frame = s.frame(100, budget)
+nodes = s._aln.count_children() + 1
+
+movie = s.movie(max_steps=100, budget=budget)
+assert movie.get_frames(movie.frame_count() - 1).steps == frame.steps == s.get_result().steps
+assert s._aln.count_children() + 1 == nodes <= 30
+assert s.get_result().status == "max_nodes"
+
+frames = []
+s.stream(frames.append, 100, budget=budget)
+assert frames[-1].steps == frame.steps and s._aln.count_children() + 1 == nodes
+
+#
+# Node indexes
+#
+# the lookups through the indexes of the root must give the same nodes, in the same order, as the
+# traversals of the tree, also after adding and removing nodes
+for aln in (Alignment("ABCAB", "ABXAB", 3, -1, -2), AlignmentStore("ABCAB", "ABXAB", 3, -1, -2).root):
+    for end, steps in AlgorithmDynamicProgramming().iterate(aln, 60):
+        assert aln.get_by_coords((2, 2)) == aln._get_by_coords_all((2, 2))
+        assert aln.get_by_level(4) == aln._get_by_level_all(3)
+
+    for node in aln.get_by_level(3):
+        node.compact()
+
+    nodes = list(aln.walk())
+
+    assert aln.count_children() == aln._count_children_all(True) == len(nodes) - 1
+    assert all(aln.get_by_id(node.id) == node for node in nodes)
+    assert aln.get_by_coords((2, 2)) == aln._get_by_coords_all((2, 2))
+
+    # the labels of the depth-first order follow the traversal, without keeping the paths
+    labels = [aln._order.label(node) for node in nodes]
+    assert labels == sorted(set(labels)) and len(aln._order.slots) == len(nodes)
+    assert aln.get_by_id("*.9") is None and aln.get_by_id("*.0") is None and aln.get_by_id("x") is None
+
+#
+# Sub tree aggregates
+#
+# the cached values of each sub tree must match the traversals after every step
+for aln in (Alignment("ABCA", "ABXA", 3, -1, -2), AlignmentStore("ABCA", "ABXA", 3, -1, -2).root):
+    for end, steps in AlgorithmBruteForce().iterate(aln, 200):
+        for node in aln.get_by_level(3) + [aln]:
+            assert node.get_best_leaf() == node._get_best_leaf_all()
+            assert node.get_solution() == node._get_solution_all()
+            assert node.get_node_to_expand() == node._get_node_to_expand_all()
+
+    aln._children[0].compact()
+    assert aln.count_children() == aln._count_children_all(True)
+    assert aln.get_best_leaf() == aln._get_best_leaf_all() and aln.get_solution() == aln._get_solution_all()
+
+#
+# Compact node store
+#
+# the views of the store must behave exactly as the `Alignment` objects
+for algo in (AlgorithmBruteForce(), AlgorithmDynamicProgramming()):
+    aln = Alignment("ABC", "AXC", 3, -1, -2)
+    store = AlignmentStore("ABC", "AXC", 3, -1, -2)
+
+    assert algo.run(aln, max_steps=100) == algo.run(store.root, max_steps=100)
+    assert tree_state(aln) == tree_state(store.root)
+    assert len(store) == aln.count_children() + 1
+
+# the nodes removed by a compact are not counted and their entries are reused by the new nodes
+store = AlignmentStore("ABCAB", "ABXAB", 3, -1, -2)
+AlgorithmBruteForce().run(store.root, max_steps=300)
+entries = len(store._parent)
+
+for node in store.root._children:
+    node.compact()
+
+assert len(store) == store.root.count_children() + 1 == 7
+assert len(store._texts) == 3 and not store._layouts
+
+AlgorithmBruteForce().run(store.root._children[0]._children[0], max_steps=20)
+assert len(store) == store.root.count_children() + 1 and len(store._parent) == entries
+
+#
+# Needleman-Wunsch
+#
+# the optimal path must have the same score as the brute force solution
+for seq1, seq2 in (("ABC", "AXC"), ("AB", "BAB"), ("", "AB"), ("", "")):
+    aln_bf = Alignment(seq1, seq2, 3, -1, -2)
+    aln_nw = Alignment(seq1, seq2, 3, -1, -2)
+
+    assert AlgorithmBruteForce().run(aln_bf, max_steps=1000)[0]
+    assert AlgorithmNeedlemanWunsch().run(aln_nw, max_steps=1000)[0]
+    assert aln_nw.get_solution().score == aln_bf.get_solution().score
+
+#
+# A*
+#
+# must find the optimal solution expanding fewer nodes than brute force
+aln_bf = Alignment("ABC", "ABXABC", 3, -1, -2)
+aln_astar = Alignment("ABC", "ABXABC", 3, -1, -2)
+
+assert AlgorithmBruteForce().run(aln_bf, max_steps=2000)[0]
+assert AlgorithmAStar().run(aln_astar, max_steps=2000)[0]
+assert aln_astar.get_solution().score == aln_bf.get_solution().score
+assert aln_astar.count_children() < aln_bf.count_children()
+
+#
+# Hirschberg
+#
+# the linear space alignment must be as good as the full matrix one
+seq1, seq2 = "ABCABXABCAAXBBCCABACBXXA" * 4, "AXBCABABCAXXBCCABABCBXA" * 4
+
+assert linear_global_alignment(seq1, seq2, 3, -1, -2)[0] == global_alignment(seq1, seq2, 3, -1, -2)[0]
+
+aln = Alignment(seq1, seq2, 3, -1, -2)
+assert AlgorithmHirschberg().run(aln, max_steps=1000)[0]
+
+# deep trees are traversed without hitting the recursion limit
+deep_seq1, deep_seq2 = seq1 * 15, seq2 * 15
+aln = Alignment(deep_seq1, deep_seq2, 3, -1, -2)
+assert AlgorithmHirschberg().run(aln, max_steps=10000)[0]
+assert aln.count_children() > sys.getrecursionlimit()
+assert aln.get_solution() is aln.get_best_leaf()
+aln._arrange_all()
+
+#
+# Alignment DAG
+#
+# a single node for each positions, unfolded back into the same tree as the brute force one
+aln = Alignment("ABCA", "AXCA", 3, -1, -2)
+assert AlgorithmBruteForce().run(aln, max_steps=5000)[0]
+
+dag = AlignmentDAG("ABCA", "AXCA", 3, -1, -2)
+assert len(dag) == 5 * 5
+assert dag.get_solution().score == global_alignment("ABCA", "AXCA", 3, -1, -2)[0]
+assert [(node.id, node.text) for node in dag.unfold().walk()] == [(node.id, node.text) for node in aln.walk()]
+
+# following only the best edges, each positions appears once with its best score
+tree = dag.unfold(best_only=True)
+assert tree.count_children() + 1 == len(dag)
+assert all(node.score == dag.get(node.coords).score for node in tree.walk())
+dag.draw(80, 35, 5, 5, canvas_class=RasterCanvas, best_only=True)
+
+#
+# Banded alignments
+#
+# the band is widened until the result is optimal
+assert banded_global_alignment(seq1, seq2, 3, -1, -2, 1)[0] == global_alignment(seq1, seq2, 3, -1, -2)[0]
+
+aln = Alignment("ABCAB", "ABXAB", 3, -1, -2)
+aln_band = Alignment("ABCAB", "ABXAB", 3, -1, -2)
+AlgorithmDynamicProgramming().run(aln, max_steps=1000)
+AlgorithmDynamicProgramming(band=0).run(aln_band, max_steps=1000)
+
+assert aln_band.get_solution().score == aln.get_solution().score
+assert aln_band.count_children() < aln.count_children()
+
 #
 # First test
 #